@@ -0,0 +1,198 @@
+"""
+Drive the upload, data, history and PDF endpoints through Django's test client at several
+dataset sizes, reporting latency, throughput, peak Python memory and query counts as JSON.
+Cached variants measure repeat requests served from the response/report caches.
+Usage: python -m benchmarks.api_benchmark [--rows 1000 10000 100000 1000000] [--repeat 3]
+                                          [--output results.json] [--baseline previous.json]
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import create_user, setup_django, throwaway_database
+from benchmarks.synthetic import csv_bytes
+
+
+ENDPOINTS = ['upload', 'data', 'data_cached', 'history', 'history_equipment', 'pdf', 'pdf_cached']
+
+# Metrics compared against a baseline run; lower is better for all of them
+COMPARED = ['median_seconds', 'peak_python_mb', 'queries']
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Runner:
+    """Issues benchmark requests for one dataset size"""
+
+    def __init__(self, client, headers, rows, args):
+        self.client = client
+        self.headers = headers
+        self.rows = rows
+        self.args = args
+        self.dataset_id = None
+        self.uploads = 0
+
+    def upload(self):
+        # A fresh seed per call keeps byte-identical uploads from being deduplicated
+        self.uploads += 1
+        content = csv_bytes(self.rows, self.args.seed + self.uploads, self.args.types, self.args.name_length)
+        upload = io.BytesIO(content)
+        upload.name = f'bench_{self.rows}.csv'
+        response = self.client.post('/api/upload/', {'file': upload}, **self.headers)
+        self.dataset_id = response.json()['id']
+        return response
+
+    def get(self, url, clear_caches):
+        from django.core.cache import cache
+        from equipment.reports import discard_report
+
+        if clear_caches:
+            cache.clear()
+            discard_report(self.dataset_id)
+        return self.client.get(url, **self.headers)
+
+    def request(self, endpoint):
+        if endpoint == 'upload':
+            return self.upload()
+        urls = {
+            'data': f'/api/data/{self.dataset_id}/',
+            'history': '/api/history/',
+            'history_equipment': '/api/history/?include=equipment',
+            'pdf': f'/api/pdf/{self.dataset_id}/',
+        }
+        cached = endpoint.endswith('_cached')
+        return self.get(urls[endpoint.removesuffix('_cached')], clear_caches=not cached)
+
+
+def response_bytes(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def measure(runner, endpoint, repeat):
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+
+    if endpoint.endswith('_cached'):
+        runner.request(endpoint)  # warm the cache
+    latencies = []
+    for _ in range(repeat):
+        # The query log is capped, so a long upload would otherwise hide later queries
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = runner.request(endpoint)
+            size = response_bytes(response)
+            latencies.append(time.perf_counter() - start)
+        assert response.status_code in (200, 201), (endpoint, response.status_code)
+
+    # Tracing slows allocation-heavy code, so memory is measured in a separate request
+    tracemalloc.start()
+    runner.request(endpoint)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(latencies)
+    return {
+        'endpoint': endpoint,
+        'rows': runner.rows,
+        'median_seconds': round(median, 4),
+        'min_seconds': round(min(latencies), 4),
+        'max_seconds': round(max(latencies), 4),
+        'rows_per_second': round(runner.rows / median, 1),
+        'peak_python_mb': round(peak / 2**20, 2),
+        'queries': len(queries),
+        'response_bytes': size,
+    }
+
+
+def compare(results, baseline):
+    """Percent change of each compared metric against a baseline run's matching result"""
+    previous = {(item['endpoint'], item['rows']): item for item in baseline['results']}
+    changes = []
+    for item in results:
+        before = previous.get((item['endpoint'], item['rows']))
+        if before is None:
+            continue
+        change = {'endpoint': item['endpoint'], 'rows': item['rows']}
+        for metric in COMPARED:
+            if before.get(metric):
+                change[f'{metric}_change_pct'] = round(100 * (item[metric] - before[metric]) / before[metric], 1)
+        changes.append(change)
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--types', type=int, default=5)
+    parser.add_argument('--name-length', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='also write the results to this file')
+    parser.add_argument('--baseline', help='results file from an earlier run to compare against')
+    args = parser.parse_args()
+
+    setup_django()
+    import django
+    from django.db import connection
+    from django.test import Client, override_settings
+    from rest_framework.authtoken.models import Token
+
+    results = []
+    with tempfile.TemporaryDirectory() as report_dir, throwaway_database(), override_settings(
+        EQUIPMENT_REPORT_DIR=report_dir,
+        EQUIPMENT_RETENTION_MAX_DATASETS=0,
+    ):
+        token = Token.objects.create(user=create_user()).key
+        headers = {'HTTP_AUTHORIZATION': f'Token {token}'}
+        for rows in args.rows:
+            runner = Runner(Client(), headers, rows, args)
+            if 'upload' not in args.endpoints:
+                runner.upload()
+            for endpoint in args.endpoints:
+                results.append(measure(runner, endpoint, args.repeat))
+        vendor = connection.vendor
+
+    output = {
+        'environment': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': vendor,
+            'machine': platform.machine(),
+        },
+        'config': {
+            'repeat': args.repeat,
+            'types': args.types,
+            'name_length': args.name_length,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            output['comparison'] = compare(results, json.load(f))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+    print(json.dumps(output, indent=2))
+
+
+if __name__ == '__main__':
+    main()
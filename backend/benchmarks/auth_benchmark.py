@@ -0,0 +1,52 @@
+"""
+Compare API throughput with per-request Basic auth against token auth.
+Usage: python -m benchmarks.auth_benchmark [--requests N]
+"""
+import argparse
+import base64
+import json
+import time
+
+from benchmarks.common import create_user, setup_django, throwaway_database
+
+
+def measure(client, url, headers, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(url, **headers)
+        assert response.status_code == 200, response.status_code
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': requests,
+        'seconds': round(elapsed, 4),
+        'requests_per_second': round(requests / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import Client
+
+    with throwaway_database():
+        create_user('bench', 'bench-password')
+        client = Client()
+        login = client.post('/api/login/', {'username': 'bench', 'password': 'bench-password'})
+        token = login.json()['token']
+
+        basic = base64.b64encode(b'bench:bench-password').decode()
+        results = {
+            'basic': measure(client, '/api/history/', {'HTTP_AUTHORIZATION': f'Basic {basic}'}, args.requests),
+            'token': measure(client, '/api/history/', {'HTTP_AUTHORIZATION': f'Token {token}'}, args.requests),
+        }
+        results['speedup'] = round(
+            results['token']['requests_per_second'] / results['basic']['requests_per_second'], 1
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+Shared setup for the backend benchmark scripts.
+Run them from the backend directory, e.g. python -m benchmarks.auth_benchmark
+"""
+import contextlib
+import os
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'chemical_equipment.settings')
+    django.setup()
+
+
+@contextlib.contextmanager
+def throwaway_database():
+    """Create a disposable test database for the duration of the block"""
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+def create_user(username='bench', password='bench-password'):
+    from django.contrib.auth.models import User
+
+    return User.objects.create_user(username=username, password=password)
@@ -0,0 +1,186 @@
+"""
+Compare how WSGI (gunicorn sync workers) and ASGI (uvicorn + /api/async/) hold up when
+slow clients are uploading: a few clients dribble CSV uploads over several seconds while
+others read summaries as fast as they can.
+Usage: python -m benchmarks.load_test [--server wsgi asgi] [--workers 2] [--slow-uploads 2]
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from benchmarks.common import create_user, setup_django
+from benchmarks.pdf_benchmark import create_dataset
+
+
+SERVERS = {
+    'wsgi': {
+        'command': ['gunicorn', 'chemical_equipment.wsgi:application', '--workers', '{workers}',
+                    '--bind', '127.0.0.1:{port}', '--log-level', 'warning'],
+        'prefix': '/api',
+    },
+    'asgi': {
+        'command': [sys.executable, '-m', 'uvicorn', 'chemical_equipment.asgi:application',
+                    '--workers', '{workers}', '--port', '{port}', '--log-level', 'warning'],
+        'prefix': '/api/async',
+    },
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server on port {port} did not start')
+
+
+def make_upload_body(rows, seed):
+    rng = np.random.default_rng(seed)
+    lines = ['Equipment Name,Type,Flowrate,Pressure,Temperature']
+    lines += [
+        f'Equipment-{i},Pump,{rng.uniform(10, 500):.2f},{rng.uniform(1, 50):.2f},{rng.uniform(20, 300):.2f}'
+        for i in range(rows)
+    ]
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="slow_{seed}.csv"\r\n'
+        f'Content-Type: text/csv\r\n\r\n' + '\n'.join(lines) + f'\n\r\n--{boundary}--\r\n'
+    ).encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+def slow_upload(port, path, token, rows, seconds, seed, results):
+    """POST an upload but send the body in small pieces spread over `seconds`"""
+    body, content_type = make_upload_body(rows, seed)
+    pieces = 50
+    size = -(-len(body) // pieces)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    conn.putrequest('POST', path)
+    conn.putheader('Authorization', f'Token {token}')
+    conn.putheader('Content-Type', content_type)
+    conn.putheader('Content-Length', str(len(body)))
+    conn.endheaders()
+    for start in range(0, len(body), size):
+        conn.send(body[start:start + size])
+        time.sleep(seconds / pieces)
+    results.append(conn.getresponse().status)
+    conn.close()
+
+
+def reader(port, path, token, stop, latencies, errors):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path, headers={'Authorization': f'Token {token}'})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as exc:
+            errors.append(type(exc).__name__)
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run(server, args, env, token):
+    port = free_port()
+    config = SERVERS[server]
+    command = [part.format(workers=args.workers, port=port) for part in config['command']]
+    process = subprocess.Popen(command, env=env)
+    try:
+        wait_until_ready(port)
+        prefix = config['prefix']
+        stop = threading.Event()
+        latencies, errors, upload_statuses = [], [], []
+        uploads = [
+            threading.Thread(target=slow_upload, args=(
+                port, f'{prefix}/upload/', token, args.upload_rows, args.slow_seconds,
+                hash((server, i)) % 2 ** 32, upload_statuses,
+            ))
+            for i in range(args.slow_uploads)
+        ]
+        readers = [
+            threading.Thread(target=reader, args=(port, f'{prefix}/summary/', token, stop, latencies, errors))
+            for _ in range(args.readers)
+        ]
+        for thread in uploads:
+            thread.start()
+        time.sleep(0.5)
+        start = time.perf_counter()
+        for thread in readers:
+            thread.start()
+        for thread in uploads:
+            thread.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    latencies = np.array(latencies) if latencies else np.array([np.nan])
+    return {
+        'workers': args.workers,
+        'slow_uploads': upload_statuses,
+        'reads': int(np.isfinite(latencies).sum()),
+        'reads_per_second': round(float(np.isfinite(latencies).sum() / elapsed), 1),
+        'p50_ms': round(float(np.nanpercentile(latencies, 50) * 1000), 1),
+        'p95_ms': round(float(np.nanpercentile(latencies, 95) * 1000), 1),
+        'max_ms': round(float(np.nanmax(latencies) * 1000), 1),
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--server', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--slow-uploads', type=int, default=2)
+    parser.add_argument('--slow-seconds', type=float, default=5.0)
+    parser.add_argument('--upload-rows', type=int, default=2000)
+    parser.add_argument('--readers', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The servers run in separate processes, so this uses a real database file
+        os.environ['SQLITE_PATH'] = os.path.join(tmp, 'db.sqlite3')
+        os.environ['EQUIPMENT_REPORT_DIR'] = os.path.join(tmp, 'reports')
+        setup_django()
+        from django.core.management import call_command
+        from rest_framework.authtoken.models import Token
+
+        call_command('migrate', verbosity=0)
+        token = Token.objects.create(user=create_user()).key
+        create_dataset(10000)
+
+        env = dict(os.environ, PYTHONPATH=os.getcwd())
+        results = {server: run(server, args, env, token) for server in args.server}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
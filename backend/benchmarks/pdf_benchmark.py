@@ -0,0 +1,62 @@
+"""
+Measure PDF report render time and peak Python memory for large datasets.
+Usage: python -m benchmarks.pdf_benchmark [--rows 10000 100000]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import setup_django, throwaway_database
+from benchmarks.synthetic import generate_frame
+
+
+def create_dataset(rows, seed=0):
+    from equipment.ingest import RunningAggregates, bulk_insert
+    from equipment.models import EquipmentDataset
+
+    df = generate_frame(rows, seed)
+    aggregates = RunningAggregates()
+    aggregates.update(df)
+    dataset = EquipmentDataset.objects.create(filename=f'bench_{rows}.csv', **aggregates.as_fields())
+    bulk_insert(dataset, df)
+    return dataset
+
+
+def measure(dataset):
+    from equipment.reports import build_report
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'report.pdf')
+        start = time.perf_counter()
+        build_report(dataset, path)
+        seconds = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+        tracemalloc.start()
+        build_report(dataset, path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        'rows': dataset.total_count,
+        'render_seconds': round(seconds, 3),
+        'peak_python_mb': round(peak / 2**20, 2),
+        'pdf_mb': round(size / 2**20, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    setup_django()
+    with throwaway_database():
+        results = [measure(create_dataset(rows)) for rows in args.rows]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
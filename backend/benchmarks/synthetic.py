@@ -0,0 +1,73 @@
+"""
+Seeded synthetic equipment CSV generator for benchmarks and manual testing.
+Usage: python -m benchmarks.synthetic --rows 100000 [--types 5] [--name-length 16] [--seed 0] [-o equipment.csv]
+"""
+import argparse
+import io
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+EQUIPMENT_TYPES = ['Pump', 'Reactor', 'Valve', 'Compressor', 'Heat Exchanger', 'Condenser', 'Mixer', 'Separator']
+
+# Rows generated per step when writing, so memory stays flat for million-row files
+CHUNK_ROWS = 100000
+
+
+def type_names(types):
+    return EQUIPMENT_TYPES[:types] + [f'Type-{i}' for i in range(len(EQUIPMENT_TYPES), types)]
+
+
+def equipment_names(rng, start, stop, name_length, digits):
+    """Unique names of at least name_length characters: random letters, a dash and the zero-padded row index"""
+    index = np.char.zfill(np.arange(start, stop).astype(str), digits)
+    pad = name_length - digits - 1
+    if pad <= 0:
+        return index
+    letters = rng.integers(ord('A'), ord('Z') + 1, size=(stop - start, pad), dtype=np.uint8)
+    return np.char.add(letters.view(f'S{pad}').ravel().astype(str), np.char.add('-', index))
+
+
+def generate_frame(rows, seed=0, types=5, name_length=16, start=0, total_rows=None, rng=None):
+    """Equipment rows start..start+rows of a total_rows file, with uniformly distributed types and parameters"""
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    digits = len(str(max((total_rows or start + rows) - 1, 0)))
+    return pd.DataFrame({
+        'Equipment Name': equipment_names(rng, start, start + rows, name_length, digits),
+        'Type': rng.choice(type_names(types), rows),
+        'Flowrate': rng.uniform(10, 500, rows).round(2),
+        'Pressure': rng.uniform(1, 50, rows).round(2),
+        'Temperature': rng.uniform(20, 300, rows).round(2),
+    })
+
+
+def write_csv(output, rows, seed=0, types=5, name_length=16):
+    """Write a synthetic CSV to a path or text file object; the same arguments give the same bytes"""
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, CHUNK_ROWS):
+        chunk = generate_frame(min(CHUNK_ROWS, rows - start), types=types, name_length=name_length,
+                               start=start, total_rows=rows, rng=rng)
+        chunk.to_csv(output, index=False, header=start == 0, mode='w' if start == 0 else 'a')
+
+
+def csv_bytes(rows, seed=0, types=5, name_length=16):
+    buffer = io.StringIO()
+    write_csv(buffer, rows, seed, types, name_length)
+    return buffer.getvalue().encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, required=True)
+    parser.add_argument('--types', type=int, default=5)
+    parser.add_argument('--name-length', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='CSV path (default: stdout)')
+    args = parser.parse_args()
+    write_csv(args.output or sys.stdout, args.rows, args.seed, args.types, args.name_length)
+
+
+if __name__ == '__main__':
+    main()
@@ -20,12 +20,15 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 
     'rest_framework',
+    'rest_framework.authtoken',
     'corsheaders',
 
     'equipment',
 ]
 
 MIDDLEWARE = [
+    'equipment.middleware.RequestMetricsMiddleware',
+    'equipment.middleware.ResponseCompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
 
     'django.middleware.security.SecurityMiddleware',
@@ -57,11 +60,38 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'chemical_equipment.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'chemical_equipment'),
+            'USER': os.getenv('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            # Seconds a connection waits on a locked database before raising "database is locked"
+            'OPTIONS': {'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '20'))},
+        }
     }
+
+# Applied to every new SQLite connection (see equipment.database). WAL lets readers
+# proceed during an upload, and synchronous=NORMAL only fsyncs at checkpoints.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'temp_store': 'memory',
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -84,6 +114,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.TokenAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -93,6 +124,64 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 100,
 }
 
+EQUIPMENT_INGEST_BATCH_SIZE = int(os.getenv('EQUIPMENT_INGEST_BATCH_SIZE', '5000'))
+EQUIPMENT_INGEST_CHUNK_ROWS = int(os.getenv('EQUIPMENT_INGEST_CHUNK_ROWS', '50000'))
+EQUIPMENT_INGEST_USE_COPY = os.getenv('EQUIPMENT_INGEST_USE_COPY', 'True') == 'True'
+EQUIPMENT_STATS_SAMPLE_SIZE = int(os.getenv('EQUIPMENT_STATS_SAMPLE_SIZE', '100000'))
+EQUIPMENT_REPORT_DIR = os.getenv('EQUIPMENT_REPORT_DIR', os.path.join(BASE_DIR, 'reports'))
+EQUIPMENT_REPORT_WORKERS = int(os.getenv('EQUIPMENT_REPORT_WORKERS', '2'))
+# Threads available to the async views for parsing, encoding and report rendering
+EQUIPMENT_ASYNC_WORKERS = int(os.getenv('EQUIPMENT_ASYNC_WORKERS', '4'))
+# Background upload jobs: ingest threads, how often progress streams poll, and how long
+# a single progress stream stays open before the client has to reconnect.
+# A stream on the WSGI route (/api/uploads/<id>/events/) occupies a worker while open, so it
+# is capped separately; serve long streams from the ASGI route /api/async/uploads/<id>/events/.
+EQUIPMENT_UPLOAD_WORKERS = int(os.getenv('EQUIPMENT_UPLOAD_WORKERS', '2'))
+EQUIPMENT_UPLOAD_PROGRESS_INTERVAL = float(os.getenv('EQUIPMENT_UPLOAD_PROGRESS_INTERVAL', '0.5'))
+EQUIPMENT_UPLOAD_EVENTS_TIMEOUT = int(os.getenv('EQUIPMENT_UPLOAD_EVENTS_TIMEOUT', '600'))
+EQUIPMENT_SYNC_UPLOAD_EVENTS_TIMEOUT = int(os.getenv('EQUIPMENT_SYNC_UPLOAD_EVENTS_TIMEOUT', '30'))
+# Jobs run on threads of the process that accepted them. A pending or running job whose row
+# hasn't been updated for this long is failed, since its process has died; raise it if jobs
+# can wait in the queue behind other uploads for longer.
+EQUIPMENT_UPLOAD_STALE_SECONDS = int(os.getenv('EQUIPMENT_UPLOAD_STALE_SECONDS', '600'))
+# Batch uploads parse files on this many worker processes
+EQUIPMENT_BATCH_WORKERS = int(os.getenv('EQUIPMENT_BATCH_WORKERS', '4'))
+EQUIPMENT_BATCH_MAX_FILES = int(os.getenv('EQUIPMENT_BATCH_MAX_FILES', '100'))
+# Uncompressed bytes per batch, checked against the zip directories before extraction
+EQUIPMENT_BATCH_MAX_BYTES = int(os.getenv('EQUIPMENT_BATCH_MAX_BYTES', str(512 * 1024 * 1024)))
+# A letter page fits the 27pt header row plus 33 rows of 18pt each.
+EQUIPMENT_REPORT_ROWS_PER_TABLE = int(os.getenv('EQUIPMENT_REPORT_ROWS_PER_TABLE', '33'))
+
+# Retention policy applied after each upload; 0 disables a limit. The row limit counts
+# stored rows, so a delta dataset counts only its own rows and removed names.
+EQUIPMENT_RETENTION_MAX_DATASETS = int(os.getenv('EQUIPMENT_RETENTION_MAX_DATASETS', '5'))
+EQUIPMENT_RETENTION_MAX_ROWS = int(os.getenv('EQUIPMENT_RETENTION_MAX_ROWS', '0'))
+EQUIPMENT_RETENTION_MAX_AGE_DAYS = int(os.getenv('EQUIPMENT_RETENTION_MAX_AGE_DAYS', '0'))
+EQUIPMENT_RETENTION_BACKGROUND = os.getenv('EQUIPMENT_RETENTION_BACKGROUND', 'False') == 'True'
+
+# Datasets never change after upload, but invalidation only orphans a dataset's payloads, so
+# they also expire after EQUIPMENT_CACHE_TIMEOUT seconds. LocMemCache evicts least recently
+# used entries past MAX_ENTRIES and every process holds its own copy: payloads take at most
+# CACHE_MAX_ENTRIES x EQUIPMENT_CACHE_MAX_ITEM_BYTES (256 MB by default) per process.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'equipment'),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '256'))},
+    }
+}
+EQUIPMENT_CACHE_MAX_ITEM_BYTES = int(os.getenv('EQUIPMENT_CACHE_MAX_ITEM_BYTES', str(1024 * 1024)))
+EQUIPMENT_CACHE_TIMEOUT = int(os.getenv('EQUIPMENT_CACHE_TIMEOUT', '3600'))
+
+# Per-request timing (Server-Timing headers and the /api/metrics/ histograms)
+EQUIPMENT_METRICS_ENABLED = os.getenv('EQUIPMENT_METRICS_ENABLED', 'True') == 'True'
+# The header shows query counts and timings to every client, so it follows DEBUG by default
+EQUIPMENT_SERVER_TIMING = os.getenv('EQUIPMENT_SERVER_TIMING', str(DEBUG)) == 'True'
+
+# GZip JSON and npz responses for clients sending Accept-Encoding: gzip
+EQUIPMENT_COMPRESSION_ENABLED = os.getenv('EQUIPMENT_COMPRESSION_ENABLED', 'True') == 'True'
+
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000').split(',')
 
 if not DEBUG:
@@ -5,6 +5,7 @@ from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/async/', include('equipment.async_urls')),
     path('api/', include('equipment.urls')),
 ]
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import EquipmentDataset, EquipmentData
+from .models import EquipmentDataset, EquipmentData, ReportJob, UploadJob
 
 
 @admin.register(EquipmentDataset)
@@ -14,3 +14,17 @@ class EquipmentDataAdmin(admin.ModelAdmin):
     list_display = ['equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature', 'dataset']
     list_filter = ['equipment_type', 'dataset']
     search_fields = ['equipment_name', 'equipment_type']
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ['dataset', 'status', 'created_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = ['created_at', 'finished_at']
+
+
+@admin.register(UploadJob)
+class UploadJobAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'status', 'rows_inserted', 'dataset', 'created_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = ['created_at', 'finished_at']
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class EquipmentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'equipment'
+
+    def ready(self):
+        from .database import configure_sqlite
+        from .metrics import install_query_timer
+        connection_created.connect(configure_sqlite, dispatch_uid='equipment_configure_sqlite')
+        connection_created.connect(install_query_timer, dispatch_uid='equipment_install_query_timer')
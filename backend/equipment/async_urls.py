@@ -0,0 +1,16 @@
+from django.urls import path
+from . import async_views
+
+# Coroutine versions of the read/upload/PDF endpoints, meant to be served by the ASGI app
+urlpatterns = [
+    path('upload/', async_views.upload_csv, name='async_upload_csv'),
+    path('uploads/', async_views.create_upload_job, name='async_create_upload_job'),
+    path('uploads/<int:job_id>/events/', async_views.upload_job_events, name='async_upload_job_events'),
+    path('summary/', async_views.get_summary, name='async_get_summary'),
+    path('summary/<int:dataset_id>/', async_views.get_summary, name='async_get_summary_by_id'),
+    path('data/', async_views.get_data, name='async_get_data'),
+    path('data/<int:dataset_id>/', async_views.get_data, name='async_get_data_by_id'),
+    path('history/', async_views.get_history, name='async_get_history'),
+    path('pdf/', async_views.generate_pdf, name='async_generate_pdf'),
+    path('pdf/<int:dataset_id>/', async_views.generate_pdf, name='async_generate_pdf_by_id'),
+]
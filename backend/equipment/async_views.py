@@ -0,0 +1,223 @@
+import asyncio
+import base64
+import binascii
+import contextvars
+import functools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.db import close_old_connections
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import APIException
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .caching import cached_response, dataset_etag, not_modified
+from .columnar import NpzRenderer
+from .events import (
+    EVENT_STREAM_CONTENT_TYPE,
+    UploadEventStream,
+    get_events_timeout,
+    get_progress_interval,
+)
+from .metrics import timed
+from .models import EquipmentDataset, UploadJob
+from .progress import get_upload_state
+from .reports import ensure_report, report_filename
+from .serializers import UploadJobSerializer
+from .uploads import process_upload, submit_upload_job, validate_upload
+from .views import build_data, build_history, build_summary
+
+
+# The sync views' renderers less the browsable API, which needs the DRF view
+SUMMARY_RENDERERS = [JSONRenderer()]
+DATA_RENDERERS = [JSONRenderer(), NpzRenderer()]
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'EQUIPMENT_ASYNC_WORKERS', 4),
+            thread_name_prefix='equipment-async',
+        )
+    return _executor
+
+
+def _call_blocking(func, *args):
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def run_blocking(func, *args):
+    """Run CPU-heavy or sync-only work on the bounded executor without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    # Carry the request's context over so its metrics see queries made on the executor
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), context.run, functools.partial(_call_blocking, func, *args))
+
+
+async def authenticate_request(request):
+    """Resolve the user from a Token or Basic Authorization header, or None"""
+    keyword, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    if keyword == 'Token' and credentials:
+        try:
+            token = await Token.objects.select_related('user').aget(key=credentials)
+        except Token.DoesNotExist:
+            return None
+        return token.user if token.user.is_active else None
+    if keyword == 'Basic' and credentials:
+        try:
+            username, _, password = base64.b64decode(credentials).decode().partition(':')
+        except (binascii.Error, UnicodeDecodeError):
+            return None
+        # Password hashing is deliberately slow, so it runs off the event loop
+        return await run_blocking(functools.partial(authenticate, request, username=username, password=password))
+    return None
+
+
+def async_api_view(methods):
+    """Async counterpart of @api_view + IsAuthenticated for plain Django coroutine views"""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+            user = await authenticate_request(request)
+            if user is None:
+                return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+            request.user = user
+            return await view(request, *args, **kwargs)
+        # Token/Basic authenticated API, same as the DRF views
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+async def _get_dataset(dataset_id=None):
+    if dataset_id:
+        try:
+            return await EquipmentDataset.objects.aget(id=dataset_id), None
+        except EquipmentDataset.DoesNotExist:
+            return None, JsonResponse({'error': 'Dataset not found'}, status=404)
+    dataset = await EquipmentDataset.objects.afirst()
+    if not dataset:
+        return None, JsonResponse({'error': 'No datasets available'}, status=404)
+    return dataset, None
+
+
+async def _json_response(data, status=200):
+    # Encoding large payloads is CPU-bound, so it happens on the executor
+    with timed('serialize'):
+        content = await run_blocking(json.dumps, data)
+    return HttpResponse(content, content_type='application/json', status=status)
+
+
+def _cached_response(request, dataset, kind, build, renderers):
+    """Run the sync views' negotiation, ETags and caching for a plain Django request.
+
+    build is called with the DRF request, which pagination needs.
+    """
+    request = Request(request)
+    try:
+        request.accepted_renderer, request.accepted_media_type = DefaultContentNegotiation().select_renderer(
+            request, renderers
+        )
+        return cached_response(request, dataset, kind, lambda: build(request))
+    except APIException as e:
+        # Same bodies as DRF's exception handler
+        detail = e.detail if isinstance(e.detail, (dict, list)) else {'detail': e.detail}
+        return JsonResponse(detail, status=e.status_code, safe=False)
+
+
+@async_api_view(['POST'])
+async def upload_csv(request):
+    payload, status_code = await run_blocking(lambda: process_upload(request.FILES, request.POST))
+    return await _json_response(payload, status_code)
+
+
+@async_api_view(['GET'])
+async def get_summary(request, dataset_id=None):
+    dataset, err = await _get_dataset(dataset_id)
+    if err:
+        return err
+
+    def build(drf_request):
+        return build_summary(dataset)
+
+    return await run_blocking(_cached_response, request, dataset, 'summary', build, SUMMARY_RENDERERS)
+
+
+@async_api_view(['GET'])
+async def get_data(request, dataset_id=None):
+    dataset, err = await _get_dataset(dataset_id)
+    if err:
+        return err
+
+    def build(drf_request):
+        return build_data(drf_request, dataset)
+
+    return await run_blocking(_cached_response, request, dataset, 'data', build, DATA_RENDERERS)
+
+
+@async_api_view(['GET'])
+async def get_history(request):
+    return await _json_response(await run_blocking(build_history, request.GET))
+
+
+@async_api_view(['GET'])
+async def generate_pdf(request, dataset_id=None):
+    dataset, err = await _get_dataset(dataset_id)
+    if err:
+        return err
+    etag = dataset_etag(dataset, 'pdf')
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    path = await run_blocking(ensure_report, dataset)
+    response = FileResponse(open(path, 'rb'), as_attachment=True, filename=report_filename(dataset.id))
+    response['ETag'] = etag
+    return response
+
+
+@async_api_view(['POST'])
+async def create_upload_job(request):
+    def submit():
+        error = validate_upload(request.FILES, request.POST)
+        if error:
+            return {'error': error}, 400
+        return UploadJobSerializer(submit_upload_job(request.FILES['file'], request.POST)).data, 202
+    payload, status_code = await run_blocking(submit)
+    return JsonResponse(payload, status=status_code)
+
+
+async def _upload_events(job_id):
+    stream = UploadEventStream()
+    deadline = time.monotonic() + get_events_timeout()
+    while True:
+        for message in stream.messages(await run_blocking(get_upload_state, job_id)):
+            yield message
+        if stream.finished or time.monotonic() >= deadline:
+            return
+        await asyncio.sleep(get_progress_interval())
+
+
+@async_api_view(['GET'])
+async def upload_job_events(request, job_id):
+    # Waiting between polls costs no thread here, unlike the WSGI stream
+    if not await UploadJob.objects.filter(id=job_id).aexists():
+        return JsonResponse({'error': 'Upload job not found'}, status=404)
+    response = StreamingHttpResponse(_upload_events(job_id), content_type=EVENT_STREAM_CONTENT_TYPE)
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
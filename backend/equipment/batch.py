@@ -0,0 +1,208 @@
+import functools
+import hashlib
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+import pandas as pd
+from django.conf import settings
+from rest_framework import status
+
+from .caching import invalidate_dataset
+from .ingest import REQUIRED_COLUMNS, IngestTimer, RunningAggregates, check_columns, ingest_frame
+from .models import EquipmentDataset
+from .retention import schedule_prune
+from .serializers import DatasetHeaderSerializer
+from .statistics import RunningStatistics
+
+
+_executor = None
+
+
+def get_max_files():
+    return getattr(settings, 'EQUIPMENT_BATCH_MAX_FILES', 100)
+
+
+def get_max_bytes():
+    return getattr(settings, 'EQUIPMENT_BATCH_MAX_BYTES', 512 * 1024 * 1024)
+
+
+def get_workers():
+    return getattr(settings, 'EQUIPMENT_BATCH_WORKERS', 4)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        # Spawned workers start from a clean interpreter rather than forking a threaded server;
+        # django.setup lets them import the equipment modules.
+        _executor = ProcessPoolExecutor(
+            max_workers=get_workers(),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        )
+    return _executor
+
+
+def _reset_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+
+
+def parse_upload(source):
+    """Process pool task: parse a CSV given as bytes or a file path and summarise it"""
+    df = pd.read_csv(io.BytesIO(source) if isinstance(source, bytes) else source)
+    check_columns(df)
+    aggregates = RunningAggregates()
+    aggregates.update(df)
+    statistics = RunningStatistics()
+    statistics.update(df)
+    return df[REQUIRED_COLUMNS], aggregates, statistics
+
+
+def _hash_source(source):
+    if isinstance(source, bytes):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    with open(source, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def collect_files(uploaded_files):
+    """Expand uploaded CSVs and zip archives into entries with a filename, size and loader, or an error.
+
+    Only the zip directories are read here: a member is decompressed when its loader is
+    called, so limits are checked against the declared sizes before anything expands.
+    Large uploads are already spooled to disk by Django, so workers read those by path
+    instead of receiving the bytes.
+    """
+    entries = []
+    for uploaded in uploaded_files:
+        if uploaded.name.endswith('.zip'):
+            try:
+                # Left open for the loaders; closing it would not close the upload anyway
+                archive = zipfile.ZipFile(uploaded)
+            except zipfile.BadZipFile:
+                entries.append({'filename': uploaded.name, 'error': 'Invalid zip archive'})
+                continue
+            for info in archive.infolist():
+                name = os.path.basename(info.filename)
+                if info.is_dir() or info.filename.startswith('__MACOSX/') or not name.endswith('.csv'):
+                    continue
+                # ZipExtFile stops at file_size, so a member can't inflate past what it declares
+                entries.append({'filename': name, 'size': info.file_size, 'load': functools.partial(archive.read, info)})
+        elif uploaded.name.endswith('.csv'):
+            load = uploaded.temporary_file_path if hasattr(uploaded, 'temporary_file_path') else uploaded.read
+            entries.append({'filename': uploaded.name, 'size': uploaded.size, 'load': load})
+        else:
+            entries.append({'filename': uploaded.name, 'error': 'Invalid file type. Please upload CSV or zip files.'})
+    return entries
+
+
+def check_limits(entries):
+    """Error message if the batch has too many files or too many uncompressed bytes, else None"""
+    if len(entries) > get_max_files():
+        return f'Too many files (at most {get_max_files()} per batch)'
+    if sum(entry.get('size', 0) for entry in entries) > get_max_bytes():
+        return f'Batch too large (at most {get_max_bytes()} uncompressed bytes)'
+    return None
+
+
+def _store(future, filename, content_hash):
+    df, aggregates, statistics = future.result()
+    with IngestTimer() as timer:
+        dataset, timer.rows = ingest_frame(df, filename, aggregates, statistics, content_hash=content_hash)
+    return dataset, timer
+
+
+def process_batch(uploaded_files):
+    """Ingest several CSV files (or zips of them), returning (payload, status code).
+
+    The file count and uncompressed size are checked from the zip directories before any
+    member is read. Files are then read one at a time as pool slots free up, parsed
+    concurrently with at most EQUIPMENT_BATCH_WORKERS in flight, and stored in the order
+    their parses finish, so memory follows the files being parsed rather than the whole
+    batch. Retention runs once after the last file.
+    """
+    entries = collect_files(uploaded_files)
+    if not entries:
+        return {'error': 'No file provided'}, status.HTTP_400_BAD_REQUEST
+    error = check_limits(entries)
+    if error:
+        return {'error': error}, status.HTTP_400_BAD_REQUEST
+
+    results = [{'filename': entry['filename']} for entry in entries]
+    pending = {}
+    created = 0
+
+    def store_finished(return_when):
+        nonlocal created
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            index, content_hash = pending.pop(future)
+            try:
+                dataset, timer = _store(future, entries[index]['filename'], content_hash)
+            except BrokenProcessPool:
+                _reset_executor()
+                results[index].update(status='failed', error='Parser process exited unexpectedly')
+                continue
+            except Exception as e:
+                results[index].update(status='failed', error=str(e))
+                continue
+            invalidate_dataset(dataset.id)
+            created += 1
+            results[index].update(status='created', dataset=DatasetHeaderSerializer(dataset).data, ingest=timer.as_dict())
+
+    first_with_hash = {}
+    for index, entry in enumerate(entries):
+        if 'error' in entry:
+            results[index].update(status='failed', error=entry['error'])
+            continue
+        try:
+            source = entry.pop('load')()
+        except (zipfile.BadZipFile, OSError) as e:
+            results[index].update(status='failed', error=f'Could not read file: {e}')
+            continue
+        content_hash = _hash_source(source)
+        existing = EquipmentDataset.objects.filter(content_hash=content_hash).first()
+        if existing is not None:
+            results[index].update(status='duplicate', dataset=DatasetHeaderSerializer(existing).data)
+        elif content_hash in first_with_hash:
+            results[index]['duplicate_of'] = first_with_hash[content_hash]
+        else:
+            first_with_hash[content_hash] = index
+            if len(pending) >= get_workers():
+                store_finished(FIRST_COMPLETED)
+            pending[get_executor().submit(parse_upload, source)] = (index, content_hash)
+        # The pool keeps the bytes until the parse finishes; nothing else needs them
+        del source
+    if pending:
+        store_finished(ALL_COMPLETED)
+
+    # Repeats of a file earlier in the same batch share its outcome
+    for result in results:
+        original = result.pop('duplicate_of', None)
+        if original is not None:
+            source = results[original]
+            if source['status'] == 'failed':
+                result.update(status='failed', error=source['error'])
+            else:
+                result.update(status='duplicate', dataset=source['dataset'])
+
+    payload = {'files': results}
+    if created:
+        retention = schedule_prune()
+        if retention is not None:
+            payload['retention'] = retention
+        return payload, status.HTTP_201_CREATED
+    if all(result['status'] == 'failed' for result in results):
+        return payload, status.HTTP_400_BAD_REQUEST
+    return payload, status.HTTP_200_OK
@@ -0,0 +1,94 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework.response import Response
+
+from .metrics import timed
+
+
+# Browsable API pages embed the request and user, so only machine formats are cached
+CACHED_FORMATS = {'json', 'npz'}
+
+
+def get_max_item_bytes():
+    return getattr(settings, 'EQUIPMENT_CACHE_MAX_ITEM_BYTES', 1024 * 1024)
+
+
+def get_cache_timeout():
+    return getattr(settings, 'EQUIPMENT_CACHE_TIMEOUT', 3600)
+
+
+def _generation_key(dataset_id):
+    return f'equipment:{dataset_id}:generation'
+
+
+def _generation(dataset_id):
+    return cache.get_or_set(_generation_key(dataset_id), lambda: uuid.uuid4().hex, None)
+
+
+def invalidate_dataset(dataset_id):
+    """Orphan every cached payload for a dataset; the LRU evicts them as new entries arrive"""
+    cache.delete(_generation_key(dataset_id))
+
+
+def dataset_etag(dataset, kind, request=None):
+    """Strong ETag for a representation of an immutable dataset, derived without building it.
+
+    With a request, the format, query and the scheme and host also count: paginated
+    payloads embed absolute next/previous links.
+    """
+    parts = [str(dataset.id), dataset.uploaded_at.isoformat(), kind]
+    if request is not None:
+        parts.append(request.build_absolute_uri('/'))
+        parts.append(request.accepted_renderer.format)
+        parts.extend(f'{name}={value}' for name, values in sorted(request.query_params.lists()) for value in values)
+    return '"%s"' % hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+
+
+def not_modified(request, etag):
+    """Return a 304 response if the client already holds etag, otherwise None.
+
+    If-None-Match compares weakly, so an ETag that GZipMiddleware marked weak still matches.
+    """
+    etags = [tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))]
+    if etag in etags or '*' in etags:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    return None
+
+
+def cached_response(request, dataset, kind, build):
+    """Serve build()'s payload for dataset rendered in the negotiated format, caching the bytes"""
+    etag = dataset_etag(dataset, kind, request)
+    response = not_modified(request, etag)
+    if response is not None:
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+    renderer = request.accepted_renderer
+    if renderer.format not in CACHED_FORMATS:
+        response = Response(build())
+        response['ETag'] = etag
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+    key = f'equipment:{dataset.id}:{_generation(dataset.id)}:{etag}'
+    content = cache.get(key)
+    if content is None:
+        data = build()
+        with timed('serialize'):
+            content = renderer.render(data, renderer.media_type, {'request': request})
+        # Bounded in size and lifetime, so orphaned generations don't stay resident
+        if len(content) <= get_max_item_bytes():
+            cache.set(key, content, get_cache_timeout())
+    response = HttpResponse(content, content_type=renderer.media_type)
+    response['ETag'] = etag
+    # JSON and npz share a URL, so shared caches must key on Accept
+    patch_vary_headers(response, ['Accept'])
+    return response
@@ -0,0 +1,48 @@
+import json
+from io import BytesIO
+
+import numpy as np
+from rest_framework.renderers import BaseRenderer
+
+
+COLUMNAR_FIELDS = ['id', 'equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
+
+DICTIONARY_FIELDS = ['equipment_name', 'equipment_type']
+
+NUMERIC_FIELDS = ['flowrate', 'pressure', 'temperature']
+
+
+def build_columns(queryset):
+    """Fetch equipment rows as contiguous column arrays.
+
+    Numeric columns become float64 arrays and string columns are dictionary-encoded
+    into <field>_values (unique strings) and <field>_codes (int32 indices).
+    """
+    rows = list(queryset.values_list(*COLUMNAR_FIELDS))
+    columns = dict(zip(COLUMNAR_FIELDS, zip(*rows))) if rows else dict.fromkeys(COLUMNAR_FIELDS, ())
+
+    arrays = {'id': np.array(columns['id'], dtype=np.int64)}
+    for field in NUMERIC_FIELDS:
+        arrays[field] = np.array(columns[field], dtype=np.float64)
+    for field in DICTIONARY_FIELDS:
+        values, codes = np.unique(np.array(columns[field], dtype=str), return_inverse=True)
+        arrays[f'{field}_values'] = values
+        arrays[f'{field}_codes'] = codes.astype(np.int32)
+    return arrays
+
+
+class NpzRenderer(BaseRenderer):
+    """Render a dict of NumPy arrays as an uncompressed .npz archive (?format=npz)"""
+    media_type = 'application/x-npz'
+    format = 'npz'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None and response.status_code >= 400:
+            response['Content-Type'] = 'application/json'
+            return json.dumps(data).encode()
+        buffer = BytesIO()
+        np.savez(buffer, **data)
+        return buffer.getvalue()
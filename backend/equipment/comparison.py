@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+from rest_framework.exceptions import ValidationError
+
+from .serializers import DatasetHeaderSerializer, DatasetStatisticsSerializer
+from .statistics import PARAMETER_COLUMNS, PERCENTILES, get_statistics
+
+
+PARAMETERS = list(PARAMETER_COLUMNS.values())
+
+DISTRIBUTION_FIELDS = ['mean', 'std', 'min', 'max'] + [f'p{p}' for p in PERCENTILES]
+
+DEFAULT_LIMIT = 50
+
+MAX_LIMIT = 1000
+
+
+def get_limit(params):
+    """Validate ?limit=, the number of matched equipment rows returned in largest_changes"""
+    value = params.get('limit')
+    if value in (None, ''):
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValidationError({'limit': f'Expected an integer, got "{value}"'})
+    if not 0 <= limit <= MAX_LIMIT:
+        raise ValidationError({'limit': f'Must be between 0 and {MAX_LIMIT}'})
+    return limit
+
+
+def _delta(value1, value2):
+    if value1 is None or value2 is None:
+        return None
+    return value1 - value2
+
+
+def _percent_change(value1, value2):
+    if value1 is None or not value2:
+        return None
+    return (value1 - value2) / value2 * 100
+
+
+def _load_frame(dataset):
+    rows = dataset.equipment_rows().values_list('equipment_name', 'equipment_type', *PARAMETERS)
+    frame = pd.DataFrame.from_records(list(rows), columns=['equipment_name', 'equipment_type'] + PARAMETERS)
+    # Records give object columns when there are no rows, which the arithmetic below rejects
+    return frame.astype({name: float for name in PARAMETERS})
+
+
+def ks_statistic(values1, values2):
+    """Two-sample Kolmogorov-Smirnov statistic: the largest gap between the two empirical CDFs"""
+    values1 = np.sort(values1[~np.isnan(values1)])
+    values2 = np.sort(values2[~np.isnan(values2)])
+    if not len(values1) or not len(values2):
+        return None
+    points = np.concatenate([values1, values2])
+    cdf1 = np.searchsorted(values1, points, side='right') / len(values1)
+    cdf2 = np.searchsorted(values2, points, side='right') / len(values2)
+    return float(np.max(np.abs(cdf1 - cdf2)))
+
+
+def compare_parameters(stats1, stats2, frame1, frame2):
+    result = {}
+    for name in PARAMETERS:
+        params1, params2 = stats1.parameters[name], stats2.parameters[name]
+        result[name] = {
+            'dataset1': {field: params1.get(field) for field in DISTRIBUTION_FIELDS},
+            'dataset2': {field: params2.get(field) for field in DISTRIBUTION_FIELDS},
+            'delta': {field: _delta(params1.get(field), params2.get(field)) for field in DISTRIBUTION_FIELDS},
+            'mean_percent_change': _percent_change(params1.get('mean'), params2.get('mean')),
+            'ks_statistic': ks_statistic(frame1[name].to_numpy(dtype=float), frame2[name].to_numpy(dtype=float)),
+        }
+    return result
+
+
+def compare_types(dataset1, dataset2, stats1, stats2):
+    counts1, counts2 = dataset1.equipment_type_distribution, dataset2.equipment_type_distribution
+    result = {}
+    for eq_type in sorted(set(counts1) | set(counts2)):
+        by_type1, by_type2 = stats1.by_type.get(eq_type, {}), stats2.by_type.get(eq_type, {})
+        entry = {
+            'count1': counts1.get(eq_type, 0),
+            'count2': counts2.get(eq_type, 0),
+            'count_delta': counts1.get(eq_type, 0) - counts2.get(eq_type, 0),
+        }
+        for name in PARAMETERS:
+            mean1 = by_type1.get(name, {}).get('mean')
+            mean2 = by_type2.get(name, {}).get('mean')
+            entry[f'{name}_mean1'] = mean1
+            entry[f'{name}_mean2'] = mean2
+            entry[f'{name}_mean_delta'] = _delta(mean1, mean2)
+        result[eq_type] = entry
+    return result
+
+
+def compare_equipment(frame1, frame2, limit):
+    """Match equipment by name and return parameter deltas, largest changes first"""
+    frame1 = frame1.drop_duplicates('equipment_name')
+    frame2 = frame2.drop_duplicates('equipment_name')
+    matched = frame1.merge(frame2, on='equipment_name', suffixes=('1', '2'))
+
+    score = np.zeros(len(matched))
+    for name in PARAMETERS:
+        matched[f'{name}_delta'] = matched[f'{name}1'] - matched[f'{name}2']
+        scale = matched[f'{name}2'].std(ddof=0) or 1.0
+        score += np.abs(matched[f'{name}_delta'].to_numpy()) / scale
+    changed = np.zeros(len(matched), dtype=bool)
+    for name in PARAMETERS:
+        changed |= matched[f'{name}_delta'].to_numpy() != 0
+    type_changed = matched['equipment_type1'] != matched['equipment_type2']
+
+    largest = matched.iloc[np.argsort(-score, kind='stable')[:limit]]
+    columns = ['equipment_name', 'equipment_type1', 'equipment_type2']
+    for name in PARAMETERS:
+        columns += [f'{name}1', f'{name}2', f'{name}_delta']
+
+    return {
+        'matched': len(matched),
+        'changed': int((changed | type_changed.to_numpy()).sum()),
+        'type_changed': int(type_changed.sum()),
+        'only_in_dataset1': int((~frame1['equipment_name'].isin(frame2['equipment_name'])).sum()),
+        'only_in_dataset2': int((~frame2['equipment_name'].isin(frame1['equipment_name'])).sum()),
+        'mean_abs_delta': {
+            name: float(matched[f'{name}_delta'].abs().mean()) if len(matched) else None
+            for name in PARAMETERS
+        },
+        'largest_changes': largest[columns].to_dict(orient='records'),
+    }
+
+
+def _dataset_summary(dataset, stats):
+    summary = dict(DatasetHeaderSerializer(dataset).data)
+    summary['statistics'] = DatasetStatisticsSerializer(stats).data
+    return summary
+
+
+def compare_datasets(dataset1, dataset2, limit=DEFAULT_LIMIT):
+    """Compare two datasets; deltas are always dataset1 minus dataset2"""
+    stats1, stats2 = get_statistics(dataset1), get_statistics(dataset2)
+    frame1, frame2 = _load_frame(dataset1), _load_frame(dataset2)
+    return {
+        'dataset1': _dataset_summary(dataset1, stats1),
+        'dataset2': _dataset_summary(dataset2, stats2),
+        'parameters': compare_parameters(stats1, stats2, frame1, frame2),
+        'types': compare_types(dataset1, dataset2, stats1, stats2),
+        'equipment': compare_equipment(frame1, frame2, limit),
+    }
@@ -0,0 +1,100 @@
+import pandas as pd
+from django.db import transaction
+
+from .ingest import REQUIRED_COLUMNS, RunningAggregates, bulk_insert, check_columns
+from .models import DatasetStatistics, EquipmentDataset, RemovedEquipment
+from .progress import UploadProgress
+from .statistics import RunningStatistics
+
+
+KEY_COLUMN = 'Equipment Name'
+
+VALUE_COLUMNS = ['Type', 'Flowrate', 'Pressure', 'Temperature']
+
+
+def _normalize(df, source):
+    """Coerce an equipment frame to the types rows are stored with, indexed by equipment name"""
+    duplicated = df[KEY_COLUMN][df[KEY_COLUMN].duplicated()].astype(str).unique()
+    if len(duplicated):
+        raise ValueError(
+            f'Delta uploads require unique Equipment Name values; {source} repeats {", ".join(duplicated[:5])}'
+        )
+    return pd.DataFrame({
+        KEY_COLUMN: df[KEY_COLUMN].astype(str).to_numpy(),
+        'Type': df['Type'].astype(str).to_numpy(),
+        'Flowrate': df['Flowrate'].astype(float).to_numpy(),
+        'Pressure': df['Pressure'].astype(float).to_numpy(),
+        'Temperature': df['Temperature'].astype(float).to_numpy(),
+    }).set_index(KEY_COLUMN, drop=False)
+
+
+def load_frame(dataset):
+    rows = dataset.equipment_rows().values_list(
+        'equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature'
+    )
+    return _normalize(pd.DataFrame.from_records(list(rows), columns=REQUIRED_COLUMNS), f'base dataset {dataset.id}')
+
+
+def diff_frames(base, new):
+    """Compare two normalized frames by row hash, returning (added, changed, removed) name indexes"""
+    base_hashes = pd.util.hash_pandas_object(base[VALUE_COLUMNS], index=False)
+    new_hashes = pd.util.hash_pandas_object(new[VALUE_COLUMNS], index=False)
+    base_hashes.index, new_hashes.index = base.index, new.index
+
+    common = new.index.intersection(base.index)
+    changed = common[new_hashes[common].to_numpy() != base_hashes[common].to_numpy()]
+    return new.index.difference(base.index), changed, base.index.difference(new.index)
+
+
+def delta_ingest(csv_file, filename, base, content_hash='', progress=None):
+    """Store an upload as a delta against base: only added/changed rows plus removed names.
+
+    Deltas are always stored against a full dataset; if base is itself a delta the
+    upload is diffed against its full dataset for storage. Summary fields are
+    derived from base's aggregates and the rows that differ from it.
+    """
+    progress = progress or UploadProgress()
+    progress.enter('parse')
+    new = pd.read_csv(csv_file)
+    progress.parsed(csv_file.tell())
+    check_columns(new)
+    new = _normalize(new, 'the upload')
+    progress.enter('aggregate')
+    base_frame = load_frame(base)
+    added, changed, removed = diff_frames(base_frame, new)
+
+    aggregates = RunningAggregates.from_dataset(base)
+    aggregates.remove(base_frame.loc[changed.union(removed)])
+    aggregates.update(new.loc[changed.union(added)])
+
+    root = base.base or base
+    if root.id == base.id:
+        stored, tombstones = new.loc[changed.union(added)], removed
+    else:
+        root_frame = load_frame(root)
+        root_added, root_changed, tombstones = diff_frames(root_frame, new)
+        stored = new.loc[root_changed.union(root_added)]
+
+    statistics = RunningStatistics()
+    statistics.update(new.reset_index(drop=True))
+
+    progress.enter('insert')
+    with transaction.atomic():
+        dataset = EquipmentDataset.objects.create(
+            filename=filename, base=root, content_hash=content_hash, **aggregates.as_fields()
+        )
+        bulk_insert(dataset, stored, progress=progress)
+        RemovedEquipment.objects.bulk_create(
+            [RemovedEquipment(dataset=dataset, equipment_name=name) for name in tombstones]
+        )
+        DatasetStatistics.objects.create(dataset=dataset, **statistics.as_fields())
+
+    summary = {
+        'base': base.id,
+        'added': len(added),
+        'changed': len(changed),
+        'removed': len(removed),
+        'unchanged': len(new) - len(added) - len(changed),
+        'stored_rows': len(stored),
+    }
+    return dataset, len(new), summary
@@ -0,0 +1,84 @@
+import json
+import time
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+
+from .models import UploadJob
+from .progress import get_upload_state
+
+
+# Comment lines keep proxies and load balancers from closing an idle stream
+HEARTBEAT_SECONDS = 15
+
+FINISHED = {UploadJob.DONE, UploadJob.FAILED}
+
+EVENT_STREAM_CONTENT_TYPE = 'text/event-stream; charset=utf-8'
+
+
+def get_progress_interval():
+    return getattr(settings, 'EQUIPMENT_UPLOAD_PROGRESS_INTERVAL', 0.5)
+
+
+def get_events_timeout():
+    return getattr(settings, 'EQUIPMENT_UPLOAD_EVENTS_TIMEOUT', 600)
+
+
+def get_sync_events_timeout():
+    # A WSGI stream holds a worker the whole time, so it is closed early and clients reconnect
+    return min(getattr(settings, 'EQUIPMENT_SYNC_UPLOAD_EVENTS_TIMEOUT', 30), get_events_timeout())
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Renders error responses for text/event-stream clients as a single `error` event"""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_event('error', data)
+
+
+class UploadEventStream:
+    """Turns successive upload job states into Server-Sent Events.
+
+    A `progress` event is sent whenever the state changes, then a final `done` or
+    `failed` event carrying the finished job.
+    """
+
+    def __init__(self):
+        self.last = None
+        self.last_sent = time.monotonic()
+        self.finished = False
+
+    def messages(self, state):
+        now = time.monotonic()
+        if state is None:
+            self.finished = True
+            return [format_event('error', {'error': 'Upload job not found'})]
+        messages = []
+        if state != self.last:
+            messages.append(format_event('progress', state))
+            self.last, self.last_sent = state, now
+        elif now - self.last_sent >= HEARTBEAT_SECONDS:
+            messages.append(': keepalive\n\n')
+            self.last_sent = now
+        if state['status'] in FINISHED:
+            messages.append(format_event(state['status'], state))
+            self.finished = True
+        return messages
+
+
+def upload_events(job_id, timeout):
+    """Yield SSE messages for an upload job until it finishes or timeout seconds pass"""
+    stream = UploadEventStream()
+    deadline = time.monotonic() + timeout
+    while True:
+        yield from stream.messages(get_upload_state(job_id))
+        if stream.finished or time.monotonic() >= deadline:
+            return
+        time.sleep(get_progress_interval())
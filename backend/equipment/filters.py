@@ -0,0 +1,49 @@
+from rest_framework.exceptions import ValidationError
+
+
+RANGE_FIELDS = ['flowrate', 'pressure', 'temperature']
+
+ORDERING_FIELDS = ['id', 'equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
+
+DEFAULT_ORDERING = ['equipment_name', 'id']
+
+
+def _parse_float(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValidationError({name: f'Expected a number, got "{value}"'})
+
+
+def filter_equipment(queryset, params):
+    """Apply ?type= and <field>_min / <field>_max range filters from query params"""
+    types = [t for t in params.get('type', '').split(',') if t]
+    if len(types) == 1:
+        queryset = queryset.filter(equipment_type=types[0])
+    elif types:
+        queryset = queryset.filter(equipment_type__in=types)
+
+    for field in RANGE_FIELDS:
+        minimum = _parse_float(params, f'{field}_min')
+        maximum = _parse_float(params, f'{field}_max')
+        if minimum is not None:
+            queryset = queryset.filter(**{f'{field}__gte': minimum})
+        if maximum is not None:
+            queryset = queryset.filter(**{f'{field}__lte': maximum})
+    return queryset
+
+
+def get_ordering(params):
+    """Validate ?ordering= (comma-separated, '-' prefix for descending) with id as tie-breaker"""
+    requested = [f.strip() for f in params.get('ordering', '').split(',') if f.strip()]
+    if not requested:
+        return list(DEFAULT_ORDERING)
+    invalid = [f for f in requested if f.lstrip('-') not in ORDERING_FIELDS]
+    if invalid:
+        raise ValidationError({'ordering': f'Cannot order by: {", ".join(invalid)}'})
+    if not any(f.lstrip('-') == 'id' for f in requested):
+        requested.append('id')
+    return requested
@@ -0,0 +1,234 @@
+import hashlib
+import io
+import time
+from collections import Counter
+
+import pandas as pd
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import DatasetStatistics, EquipmentDataset, EquipmentData
+from .progress import UploadProgress
+from .statistics import RunningStatistics
+
+
+REQUIRED_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+
+AVERAGE_FIELDS = {
+    'Flowrate': 'avg_flowrate',
+    'Pressure': 'avg_pressure',
+    'Temperature': 'avg_temperature',
+}
+
+
+def get_batch_size():
+    return getattr(settings, 'EQUIPMENT_INGEST_BATCH_SIZE', 5000)
+
+
+def get_chunk_size():
+    return getattr(settings, 'EQUIPMENT_INGEST_CHUNK_ROWS', 50000)
+
+
+def use_copy():
+    return connection.vendor == 'postgresql' and getattr(settings, 'EQUIPMENT_INGEST_USE_COPY', True)
+
+
+def hash_upload(uploaded_file):
+    """SHA-256 hex digest of an uploaded file, read chunk by chunk and rewound afterwards"""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def check_columns(df):
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f'Missing required columns: {", ".join(missing_columns)}')
+
+
+class RunningAggregates:
+    """Dataset summary fields accumulated chunk by chunk"""
+
+    def __init__(self):
+        self.total_count = 0
+        self.sums = dict.fromkeys(AVERAGE_FIELDS, 0.0)
+        self.counts = dict.fromkeys(AVERAGE_FIELDS, 0)
+        self.type_counts = Counter()
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        """Resume from a stored dataset's summary fields (every stored value is non-null)"""
+        aggregates = cls()
+        aggregates.total_count = dataset.total_count
+        for column, field in AVERAGE_FIELDS.items():
+            aggregates.sums[column] = getattr(dataset, field) * dataset.total_count
+            aggregates.counts[column] = dataset.total_count
+        aggregates.type_counts.update(dataset.equipment_type_distribution)
+        return aggregates
+
+    def update(self, chunk):
+        self.total_count += len(chunk)
+        for column in AVERAGE_FIELDS:
+            self.sums[column] += float(chunk[column].sum())
+            self.counts[column] += int(chunk[column].count())
+        self.type_counts.update(chunk['Type'].value_counts().to_dict())
+
+    def remove(self, chunk):
+        """Undo update() for rows that are no longer part of the dataset"""
+        self.total_count -= len(chunk)
+        for column in AVERAGE_FIELDS:
+            self.sums[column] -= float(chunk[column].sum())
+            self.counts[column] -= int(chunk[column].count())
+        self.type_counts.subtract(chunk['Type'].value_counts().to_dict())
+
+    def mean(self, column):
+        if not self.counts[column]:
+            return 0.0
+        return self.sums[column] / self.counts[column]
+
+    def as_fields(self):
+        fields = {field: self.mean(column) for column, field in AVERAGE_FIELDS.items()}
+        fields['total_count'] = self.total_count
+        fields['equipment_type_distribution'] = {
+            eq_type: count for eq_type, count in self.type_counts.most_common() if count > 0
+        }
+        return fields
+
+
+def build_equipment_rows(dataset, df):
+    """Build unsaved EquipmentData instances from a DataFrame in one column-wise pass"""
+    names = df['Equipment Name'].astype(str).tolist()
+    types = df['Type'].astype(str).tolist()
+    flowrates = df['Flowrate'].to_numpy(dtype=float).tolist()
+    pressures = df['Pressure'].to_numpy(dtype=float).tolist()
+    temperatures = df['Temperature'].to_numpy(dtype=float).tolist()
+    return [
+        EquipmentData(
+            dataset=dataset,
+            equipment_name=name,
+            equipment_type=eq_type,
+            flowrate=flowrate,
+            pressure=pressure,
+            temperature=temperature,
+        )
+        for name, eq_type, flowrate, pressure, temperature
+        in zip(names, types, flowrates, pressures, temperatures)
+    ]
+
+
+def copy_insert(dataset, df):
+    """Stream every row of df for dataset into PostgreSQL with COPY, returning the row count"""
+    frame = pd.DataFrame({
+        'dataset': dataset.id,
+        'equipment_name': df['Equipment Name'].astype(str),
+        'equipment_type': df['Type'].astype(str),
+        'flowrate': df['Flowrate'].astype(float),
+        'pressure': df['Pressure'].astype(float),
+        'temperature': df['Temperature'].astype(float),
+    })
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False)
+
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(EquipmentData._meta.get_field(name).column) for name in frame.columns)
+    sql = f'COPY {quote(EquipmentData._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)'
+    with connection.cursor() as cursor:
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, 'copy_expert'):
+            buffer.seek(0)
+            raw_cursor.copy_expert(sql, buffer)
+        else:
+            with raw_cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    return len(frame)
+
+
+def bulk_insert(dataset, df, batch_size=None, progress=None):
+    """Insert every row of df for dataset in chunks of batch_size, returning the row count"""
+    progress = progress or UploadProgress()
+    if use_copy():
+        with transaction.atomic():
+            total = copy_insert(dataset, df)
+        progress.inserted(total)
+        return total
+    batch_size = batch_size or get_batch_size()
+    total = 0
+    with transaction.atomic():
+        for start in range(0, len(df), batch_size):
+            rows = build_equipment_rows(dataset, df.iloc[start:start + batch_size])
+            EquipmentData.objects.bulk_create(rows, batch_size=batch_size)
+            total += len(rows)
+            progress.inserted(len(rows))
+    return total
+
+
+def stream_ingest(csv_file, filename, chunk_size=None, batch_size=None, content_hash='', progress=None):
+    """Parse csv_file in chunks, persisting each one and updating the dataset aggregates as it goes.
+
+    Only one chunk of rows is held in memory at a time, so peak memory is bounded by
+    the chunk size rather than the size of the upload.
+    """
+    progress = progress or UploadProgress()
+    aggregates = RunningAggregates()
+    statistics = RunningStatistics()
+    dataset = None
+    with transaction.atomic():
+        progress.enter('parse')
+        for chunk in pd.read_csv(csv_file, chunksize=chunk_size or get_chunk_size()):
+            # The parser reads ahead in blocks, so this is an upper bound on the bytes parsed
+            progress.parsed(csv_file.tell())
+            if dataset is None:
+                check_columns(chunk)
+                dataset = EquipmentDataset.objects.create(
+                    filename=filename, content_hash=content_hash, **aggregates.as_fields()
+                )
+            progress.enter('aggregate')
+            aggregates.update(chunk)
+            statistics.update(chunk)
+            progress.enter('insert')
+            bulk_insert(dataset, chunk, batch_size, progress)
+            progress.enter('parse')
+        progress.parsed(csv_file.tell())
+        progress.enter('aggregate')
+        fields = aggregates.as_fields()
+        for field, value in fields.items():
+            setattr(dataset, field, value)
+        dataset.save(update_fields=list(fields))
+        DatasetStatistics.objects.create(dataset=dataset, **statistics.as_fields())
+    return dataset, aggregates.total_count
+
+
+def ingest_frame(df, filename, aggregates, statistics, content_hash=''):
+    """Persist a fully parsed upload whose aggregates and statistics were computed beforehand"""
+    with transaction.atomic():
+        dataset = EquipmentDataset.objects.create(
+            filename=filename, content_hash=content_hash, **aggregates.as_fields()
+        )
+        bulk_insert(dataset, df)
+        DatasetStatistics.objects.create(dataset=dataset, **statistics.as_fields())
+    return dataset, len(df)
+
+
+class IngestTimer:
+    """Context manager measuring row throughput of an ingestion run"""
+
+    def __init__(self):
+        self.rows = 0
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._start
+        return False
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'seconds': round(self.seconds, 4),
+            'rows_per_second': round(self.rows / self.seconds, 1) if self.seconds else None,
+        }
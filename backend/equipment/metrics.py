@@ -0,0 +1,166 @@
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+PERCENTILES = [50, 90, 95, 99]
+
+# Buckets grow by 2**(1/8), so a reported percentile is within ~4.5% of the true value
+BUCKETS_PER_DOUBLING = 8
+
+_current = contextvars.ContextVar('equipment_request_metrics', default=None)
+
+
+class Histogram:
+    """Log-bucketed histogram of non-negative values with approximate percentiles"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.zeros = 0
+
+    def record(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        if value <= 0:
+            self.zeros += 1
+            return
+        index = math.floor(math.log2(value) * BUCKETS_PER_DOUBLING)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def percentile(self, q):
+        rank = math.ceil(self.count * q / 100)
+        if rank <= self.zeros:
+            return 0.0
+        seen = self.zeros
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # Geometric midpoint of the bucket, capped at the largest value seen
+                return min(2 ** ((index + 0.5) / BUCKETS_PER_DOUBLING), self.max)
+        return self.max
+
+    def summary(self):
+        if not self.count:
+            return {'mean': None, 'max': None, **{f'p{q}': None for q in PERCENTILES}}
+        result = {'mean': round(self.total / self.count, 3), 'max': round(self.max, 3)}
+        for q in PERCENTILES:
+            result[f'p{q}'] = round(self.percentile(q), 3)
+        return result
+
+
+class RequestMetrics:
+    """Timings collected while one request is handled"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.spans = {}
+
+    def add_span(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def server_timing(self, wall_seconds):
+        """Server-Timing header value for these timings"""
+        parts = [f'db;dur={self.db_seconds * 1000:.2f};desc="{self.db_queries} queries"']
+        parts += [f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.spans.items()]
+        parts.append(f'total;dur={wall_seconds * 1000:.2f}')
+        return ', '.join(parts)
+
+
+def current_metrics():
+    return _current.get()
+
+
+def begin_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to the current request's `name` span"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.add_span(name, time.perf_counter() - start)
+
+
+def time_query(execute, sql, params, many, context):
+    """Database execute wrapper charging query time to the current request, if any"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_queries += 1
+        metrics.db_seconds += time.perf_counter() - start
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """connection_created handler adding time_query to every connection's execute wrappers.
+
+    Registering per connection rather than with a per-request execute_wrapper() block
+    also covers queries that async views run on other threads.
+    """
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class MetricsRegistry:
+    """Per-endpoint histograms of request timings, kept in process memory"""
+
+    FIELDS = ['wall_ms', 'db_ms', 'db_queries', 'serialize_ms', 'response_bytes']
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, status_code, values):
+        with self._lock:
+            entry = self._endpoints.get(endpoint)
+            if entry is None:
+                entry = self._endpoints[endpoint] = {
+                    'count': 0,
+                    'errors': 0,
+                    'histograms': {field: Histogram() for field in self.FIELDS},
+                }
+            entry['count'] += 1
+            if status_code >= 500:
+                entry['errors'] += 1
+            for field, value in values.items():
+                if value is not None:
+                    entry['histograms'][field].record(value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    'count': entry['count'],
+                    'errors': entry['errors'],
+                    **{field: histogram.summary() for field, histogram in entry['histograms'].items()},
+                }
+                for endpoint, entry in sorted(self._endpoints.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,102 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+
+from .metrics import begin_request, current_metrics, end_request, registry
+
+
+# Media types worth compressing; npz archives are written uncompressed by NpzRenderer
+COMPRESSED_MEDIA_TYPES = {'application/json', 'application/x-npz', 'text/html'}
+
+
+def _response_bytes(response):
+    if not response.streaming:
+        return len(response.content)
+    if response.has_header('Content-Length'):
+        return int(response['Content-Length'])
+    return None
+
+
+class RequestMetricsMiddleware:
+    """Time each request, its database queries and response rendering.
+
+    Records the timings per endpoint in the histograms served by /api/metrics/, and with
+    EQUIPMENT_SERVER_TIMING (DEBUG by default) adds them to each response as a
+    Server-Timing header. The header exposes query counts to anyone, so it is off in production.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'EQUIPMENT_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'EQUIPMENT_SERVER_TIMING', settings.DEBUG)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics, token = begin_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics, token = begin_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return self._finish(request, response, metrics)
+
+    def process_template_response(self, request, response):
+        # DRF renders its Response right after this hook, so rendering time is the serialize span
+        metrics = current_metrics()
+        if metrics is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: metrics.add_span('serialize', time.perf_counter() - start)
+            )
+        return response
+
+    def _finish(self, request, response, metrics):
+        wall_seconds = time.perf_counter() - metrics.start
+        if self.server_timing:
+            response['Server-Timing'] = metrics.server_timing(wall_seconds)
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            registry.record(f'{request.method} /{match.route}', response.status_code, {
+                'wall_ms': wall_seconds * 1000,
+                'db_ms': metrics.db_seconds * 1000,
+                'db_queries': metrics.db_queries,
+                'serialize_ms': metrics.spans.get('serialize', 0.0) * 1000,
+                'response_bytes': _response_bytes(response),
+            })
+        return response
+
+
+class ResponseCompressionMiddleware(GZipMiddleware):
+    """GZip-compress API payloads for clients that accept it.
+
+    Streaming responses are passed through: gzip holds output back until it has a block
+    to emit, which would delay upload progress events, and PDF downloads are already
+    compressed.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'EQUIPMENT_COMPRESSION_ENABLED', True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        media_type = response.get('Content-Type', '').split(';')[0].strip()
+        if response.streaming or media_type not in COMPRESSED_MEDIA_TYPES:
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipmentdata',
+            index=models.Index(fields=['dataset', 'equipment_type'], name='equipment_dataset_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipmentdata',
+            index=models.Index(fields=['dataset', 'equipment_name'], name='equipment_dataset_name_idx'),
+        ),
+    ]
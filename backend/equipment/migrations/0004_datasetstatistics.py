@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0003_reportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('parameters', models.JSONField()),
+                ('by_type', models.JSONField()),
+                ('top', models.JSONField()),
+                ('sample_size', models.IntegerField()),
+                ('exact_percentiles', models.BooleanField(default=True)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('dataset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='equipment.equipmentdataset')),
+            ],
+        ),
+    ]
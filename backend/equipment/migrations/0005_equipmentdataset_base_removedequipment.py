@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0004_datasetstatistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentdataset',
+            name='base',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='deltas', to='equipment.equipmentdataset'),
+        ),
+        migrations.CreateModel(
+            name='RemovedEquipment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('equipment_name', models.CharField(max_length=255)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='removed_equipment', to='equipment.equipmentdataset')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dataset', 'equipment_name'], name='removed_dataset_name_idx')],
+            },
+        ),
+    ]
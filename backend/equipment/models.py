@@ -11,6 +11,10 @@ class EquipmentDataset(models.Model):
     avg_pressure = models.FloatField()
     avg_temperature = models.FloatField()
     equipment_type_distribution = models.JSONField() 
+    # Set for delta uploads, which only store rows added or changed relative to this full dataset
+    base = models.ForeignKey('self', null=True, blank=True, on_delete=models.PROTECT, related_name='deltas')
+    # SHA-256 of the uploaded file, used to recognise byte-identical re-uploads
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
     
     class Meta:
         ordering = ['-uploaded_at']
@@ -18,6 +22,19 @@ class EquipmentDataset(models.Model):
     def __str__(self):
         return f"{self.filename} - {self.uploaded_at.strftime('%Y-%m-%d %H:%M:%S')}"
 
+    def equipment_rows(self):
+        """All equipment rows of this dataset, overlaying a delta's own rows on its base"""
+        if self.base_id is None:
+            return self.equipment.all()
+        overridden = EquipmentData.objects.filter(dataset_id=self.id).values('equipment_name')
+        removed = RemovedEquipment.objects.filter(dataset_id=self.id).values('equipment_name')
+        inherited = (
+            models.Q(dataset_id=self.base_id)
+            & ~models.Q(equipment_name__in=overridden)
+            & ~models.Q(equipment_name__in=removed)
+        )
+        return EquipmentData.objects.filter(models.Q(dataset_id=self.id) | inherited)
+
 
 class EquipmentData(models.Model):
     """Model to store individual equipment records"""
@@ -30,6 +47,101 @@ class EquipmentData(models.Model):
     
     class Meta:
         ordering = ['equipment_name']
+        indexes = [
+            models.Index(fields=['dataset', 'equipment_type'], name='equipment_dataset_type_idx'),
+            models.Index(fields=['dataset', 'equipment_name'], name='equipment_dataset_name_idx'),
+        ]
     
     def __str__(self):
         return f"{self.equipment_name} ({self.equipment_type})"
+
+
+class RemovedEquipment(models.Model):
+    """Equipment present in a delta dataset's base but missing from the delta upload"""
+    dataset = models.ForeignKey(EquipmentDataset, on_delete=models.CASCADE, related_name='removed_equipment')
+    equipment_name = models.CharField(max_length=255)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['dataset', 'equipment_name'], name='removed_dataset_name_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.equipment_name} removed in dataset {self.dataset_id}"
+
+
+class ReportJob(models.Model):
+    """Background PDF report rendering job for a dataset"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    dataset = models.ForeignKey(EquipmentDataset, on_delete=models.CASCADE, related_name='report_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Report for dataset {self.dataset_id} ({self.status})"
+
+
+class UploadJob(models.Model):
+    """Background CSV ingestion job whose progress clients can follow"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    filename = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    stage = models.CharField(max_length=20, blank=True)
+    bytes_total = models.BigIntegerField(default=0)
+    bytes_parsed = models.BigIntegerField(default=0)
+    rows_inserted = models.IntegerField(default=0)
+    stage_seconds = models.JSONField(default=dict)
+    dataset = models.ForeignKey(
+        EquipmentDataset, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_jobs'
+    )
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    # Refreshed while the job runs; a job that stops updating lost its worker
+    updated_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Upload of {self.filename} ({self.status})"
+
+
+class DatasetStatistics(models.Model):
+    """Descriptive statistics computed once when a dataset is ingested"""
+    dataset = models.OneToOneField(EquipmentDataset, on_delete=models.CASCADE, related_name='statistics')
+    parameters = models.JSONField()
+    by_type = models.JSONField()
+    top = models.JSONField()
+    sample_size = models.IntegerField()
+    exact_percentiles = models.BooleanField(default=True)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Statistics for dataset {self.dataset_id}"
@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class EquipmentCursorPagination(CursorPagination):
+    """Cursor pagination over equipment rows using an ordering chosen per request"""
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def __init__(self, ordering):
+        self.ordering = tuple(ordering)
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
@@ -0,0 +1,153 @@
+import contextlib
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import UploadJob
+from .serializers import UploadJobSerializer
+
+
+# Long enough for any client still following a job; the job row keeps the final state
+PROGRESS_TIMEOUT = 3600
+
+# Seconds between writes of live progress to the job row. Processes that can't see this
+# process's cache read progress from the row, and its updated_at shows the worker is alive.
+ROW_UPDATE_INTERVAL = 5
+
+ACTIVE = {UploadJob.PENDING, UploadJob.RUNNING}
+
+STALE_ERROR = 'The upload worker stopped before the job finished; please upload the file again'
+
+PROGRESS_FIELDS = ['stage', 'bytes_total', 'bytes_parsed', 'rows_inserted', 'stage_seconds', 'updated_at']
+
+
+def get_stale_seconds():
+    return getattr(settings, 'EQUIPMENT_UPLOAD_STALE_SECONDS', 600)
+
+
+def upload_path(job_id):
+    """Temporary copy of a job's upload, named after the job so a stale job's copy can be removed"""
+    return os.path.join(tempfile.gettempdir(), f'equipment-upload-{job_id}.csv')
+
+
+def remove_upload(job_id):
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(upload_path(job_id))
+
+
+def _progress_key(job_id):
+    return f'equipment:upload:{job_id}'
+
+
+class UploadProgress:
+    """Stage, byte and row counters for an upload, published to the cache for progress streams.
+
+    Without a job nothing is published, so ingest code can report progress unconditionally.
+    Time spent in each stage is accumulated in stage_seconds.
+    """
+
+    def __init__(self, job=None, bytes_total=0):
+        self.job = job
+        self.stage = ''
+        self.bytes_total = bytes_total
+        self.bytes_parsed = 0
+        self.rows_inserted = 0
+        self.stage_seconds = {}
+        self._stage_start = None
+        self._row_updated = time.monotonic()
+
+    def _close_stage(self):
+        if self._stage_start is not None:
+            elapsed = time.perf_counter() - self._stage_start
+            self.stage_seconds[self.stage] = round(self.stage_seconds.get(self.stage, 0.0) + elapsed, 4)
+            self._stage_start = None
+
+    def enter(self, stage):
+        self._close_stage()
+        self.stage = stage
+        self._stage_start = time.perf_counter()
+        self.publish()
+
+    def parsed(self, bytes_parsed):
+        self.bytes_parsed = min(bytes_parsed, self.bytes_total) if self.bytes_total else bytes_parsed
+        self.publish()
+
+    def inserted(self, rows):
+        self.rows_inserted += rows
+        self.publish()
+
+    def finish(self):
+        self._close_stage()
+        if self.job is not None:
+            self._apply()
+
+    def _apply(self):
+        self.job.stage = self.stage
+        self.job.bytes_total = self.bytes_total
+        self.job.bytes_parsed = self.bytes_parsed
+        self.job.rows_inserted = self.rows_inserted
+        self.job.stage_seconds = self.stage_seconds
+
+    def publish(self):
+        if self.job is None:
+            return
+        self._apply()
+        if time.monotonic() - self._row_updated >= ROW_UPDATE_INTERVAL:
+            self.job.updated_at = timezone.now()
+            self.job.save(update_fields=PROGRESS_FIELDS)
+            self._row_updated = time.monotonic()
+        publish_job(self.job)
+
+
+def publish_job(job):
+    cache.set(_progress_key(job.id), dict(UploadJobSerializer(job).data), PROGRESS_TIMEOUT)
+
+
+def fail_stale_jobs(job_ids=None):
+    """Fail unfinished jobs not updated for EQUIPMENT_UPLOAD_STALE_SECONDS and remove their uploads.
+
+    Jobs run on threads of the process that accepted them, so a restarted or killed
+    process leaves its jobs pending or running with nobody left to finish them.
+    """
+    now = timezone.now()
+    jobs = UploadJob.objects.filter(status__in=ACTIVE, updated_at__lt=now - timedelta(seconds=get_stale_seconds()))
+    if job_ids is not None:
+        jobs = jobs.filter(id__in=job_ids)
+    stale = list(jobs.values_list('id', flat=True))
+    if stale:
+        jobs.filter(id__in=stale).update(status=UploadJob.FAILED, error=STALE_ERROR, updated_at=now, finished_at=now)
+        for job_id in stale:
+            cache.delete(_progress_key(job_id))
+            remove_upload(job_id)
+    return stale
+
+
+def _is_stale(state):
+    cutoff = timezone.now() - timedelta(seconds=get_stale_seconds())
+    return state['status'] in ACTIVE and parse_datetime(state['updated_at']) < cutoff
+
+
+def get_upload_state(job_id):
+    """Latest state of an upload job: live progress from the cache, else the stored row, else None.
+
+    A job whose worker stopped reporting is failed here, so clients following it get an answer.
+    """
+    state = cache.get(_progress_key(job_id))
+    if state is not None and not _is_stale(state):
+        return state
+    if state is not None:
+        fail_stale_jobs([job_id])
+    job = UploadJob.objects.filter(id=job_id).first()
+    if job is None:
+        return None
+    state = dict(UploadJobSerializer(job).data)
+    if _is_stale(state) and fail_stale_jobs([job_id]):
+        job.refresh_from_db()
+        state = dict(UploadJobSerializer(job).data)
+    return state
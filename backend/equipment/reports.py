@@ -0,0 +1,238 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib import colors
+
+from .models import ReportJob
+
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'EQUIPMENT_REPORT_WORKERS', 2),
+            thread_name_prefix='equipment-report',
+        )
+    return _executor
+
+
+def report_filename(dataset_id):
+    return f'equipment_report_{dataset_id}.pdf'
+
+
+def report_path(dataset_id):
+    return os.path.join(settings.EQUIPMENT_REPORT_DIR, report_filename(dataset_id))
+
+
+EQUIPMENT_COLUMNS = ['equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
+
+EQUIPMENT_HEADER = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+
+EQUIPMENT_COL_WIDTHS = [1.5*inch, 1.2*inch, 0.8*inch, 0.8*inch, 0.8*inch]
+
+EQUIPMENT_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3949ab')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+])
+
+
+class ChunkedDocTemplate(SimpleDocTemplate):
+    """SimpleDocTemplate that pulls trailing flowables from an iterator as the story drains.
+
+    Only a couple of flowables from the iterator are alive at once, so a report with
+    thousands of table pages never holds more than one page of table rows in memory.
+    """
+
+    def __init__(self, filename, pending, **kw):
+        super().__init__(filename, **kw)
+        self._pending = iter(pending)
+        self._story = None
+
+    def _refill(self, flowables):
+        # handle_flowable is also used for ReportLab's internal queues; only feed the story.
+        # One flowable of look-ahead keeps keepWithNext binding headings to tables.
+        if flowables is not self._story:
+            return
+        while len(flowables) < 2:
+            flowable = next(self._pending, None)
+            if flowable is None:
+                return
+            flowables.append(flowable)
+
+    def build(self, flowables, *args, **kwargs):
+        self._story = flowables
+        super().build(flowables, *args, **kwargs)
+
+    def handle_flowable(self, flowables):
+        self._refill(flowables)
+        super().handle_flowable(flowables)
+        self._refill(flowables)
+
+
+def _equipment_tables(dataset, rows_per_table=None):
+    """Yield the equipment details as a sequence of page-sized tables"""
+    rows_per_table = rows_per_table or getattr(settings, 'EQUIPMENT_REPORT_ROWS_PER_TABLE', 33)
+    rows = dataset.equipment_rows().values_list(*EQUIPMENT_COLUMNS).iterator(chunk_size=2000)
+    while True:
+        chunk = list(islice(rows, rows_per_table))
+        if not chunk:
+            return
+        table_data = [EQUIPMENT_HEADER]
+        for name, eq_type, flowrate, pressure, temperature in chunk:
+            table_data.append([name, eq_type, f"{flowrate:.2f}", f"{pressure:.2f}", f"{temperature:.2f}"])
+        table = Table(table_data, colWidths=EQUIPMENT_COL_WIDTHS, repeatRows=1)
+        table.setStyle(EQUIPMENT_TABLE_STYLE)
+        yield table
+
+
+def build_report(dataset, output):
+    """Render the PDF report for dataset into output (a path or binary file object)"""
+    doc = ChunkedDocTemplate(output, _equipment_tables(dataset), pagesize=letter)
+    story = []
+    
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        textColor=colors.HexColor('#1a237e'),
+        spaceAfter=30,
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=colors.HexColor('#283593'),
+        spaceAfter=12,
+    )
+    
+    story.append(Paragraph("Chemical Equipment Parameter Report", title_style))
+    story.append(Spacer(1, 0.2*inch))
+    
+    story.append(Paragraph(f"<b>Dataset:</b> {dataset.filename}", styles['Normal']))
+    story.append(Paragraph(f"<b>Uploaded:</b> {dataset.uploaded_at.strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
+    story.append(Spacer(1, 0.3*inch))
+    
+    story.append(Paragraph("Summary Statistics", heading_style))
+    summary_data = [
+        ['Metric', 'Value'],
+        ['Total Equipment Count', str(dataset.total_count)],
+        ['Average Flowrate', f"{dataset.avg_flowrate:.2f}"],
+        ['Average Pressure', f"{dataset.avg_pressure:.2f}"],
+        ['Average Temperature', f"{dataset.avg_temperature:.2f}"],
+    ]
+    summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3949ab')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]))
+    story.append(summary_table)
+    story.append(Spacer(1, 0.3*inch))
+    
+    story.append(Paragraph("Equipment Type Distribution", heading_style))
+    type_data = [['Equipment Type', 'Count']]
+    for eq_type, count in dataset.equipment_type_distribution.items():
+        type_data.append([eq_type, str(count)])
+    
+    type_table = Table(type_data, colWidths=[3*inch, 2*inch])
+    type_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3949ab')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]))
+    story.append(type_table)
+    story.append(Spacer(1, 0.3*inch))
+    
+    story.append(Paragraph("Equipment Details", heading_style))
+    
+    doc.build(story)
+
+
+def ensure_report(dataset):
+    """Return the path of the cached report for dataset, rendering it first if needed.
+
+    Reports are written to a temporary file and moved into place, so readers never
+    see a partially written PDF.
+    """
+    path = report_path(dataset.id)
+    if os.path.exists(path):
+        return path
+    os.makedirs(settings.EQUIPMENT_REPORT_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix='.pdf', dir=settings.EQUIPMENT_REPORT_DIR)
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            build_report(dataset, output)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def discard_report(dataset_id):
+    try:
+        os.remove(report_path(dataset_id))
+    except FileNotFoundError:
+        pass
+
+
+def _run_job(job_id):
+    close_old_connections()
+    try:
+        job = ReportJob.objects.select_related('dataset').get(id=job_id)
+        job.status = ReportJob.RUNNING
+        job.save(update_fields=['status'])
+        try:
+            ensure_report(job.dataset)
+        except Exception as e:
+            job.status = ReportJob.FAILED
+            job.error = str(e)
+        else:
+            job.status = ReportJob.DONE
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+    except ReportJob.DoesNotExist:
+        pass
+    finally:
+        close_old_connections()
+
+
+def submit_report_job(dataset):
+    """Create a ReportJob for dataset and render it on the worker pool unless it is already cached"""
+    if os.path.exists(report_path(dataset.id)):
+        return ReportJob.objects.create(dataset=dataset, status=ReportJob.DONE, finished_at=timezone.now())
+    job = ReportJob.objects.create(dataset=dataset)
+    get_executor().submit(_run_job, job.id)
+    return job
@@ -0,0 +1,130 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .caching import invalidate_dataset
+from .models import DatasetStatistics, EquipmentData, EquipmentDataset, RemovedEquipment, ReportJob
+from .reports import discard_report
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        # One worker so overlapping uploads never prune concurrently
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='equipment-retention')
+    return _executor
+
+
+def get_policy():
+    """Retention limits from settings; 0 disables a limit"""
+    return {
+        'max_datasets': getattr(settings, 'EQUIPMENT_RETENTION_MAX_DATASETS', 5),
+        'max_rows': getattr(settings, 'EQUIPMENT_RETENTION_MAX_ROWS', 0),
+        'max_age_days': getattr(settings, 'EQUIPMENT_RETENTION_MAX_AGE_DAYS', 0),
+    }
+
+
+def _stored_rows(delta_ids):
+    """Rows each delta actually stores: its added and changed rows plus its tombstones"""
+    counts = dict.fromkeys(delta_ids, 0)
+    for model in (EquipmentData, RemovedEquipment):
+        grouped = model.objects.filter(dataset_id__in=delta_ids).order_by().values_list('dataset_id').annotate(Count('id'))
+        for dataset_id, count in grouped:
+            counts[dataset_id] += count
+    return counts
+
+
+def select_expired(max_datasets=0, max_rows=0, max_age_days=0):
+    """Ids of datasets outside the policy, judged newest first.
+
+    max_rows budgets stored rows: a full dataset counts its total_count and a delta only
+    the rows and tombstones it stores. The newest dataset is always kept so a single
+    oversized upload survives its own pruning.
+    """
+    cutoff = timezone.now() - timedelta(days=max_age_days) if max_age_days else None
+    expired = []
+    kept_rows = 0
+    headers = list(EquipmentDataset.objects.order_by('-uploaded_at', '-id').values_list(
+        'id', 'total_count', 'uploaded_at', 'base_id'
+    ))
+    delta_rows = _stored_rows([row[0] for row in headers if row[3] is not None]) if max_rows else {}
+    kept_bases = set()
+    for position, (dataset_id, total_count, uploaded_at, base_id) in enumerate(headers):
+        rows = delta_rows.get(dataset_id, total_count)
+        kept_rows += rows
+        if position and (
+            (max_datasets and position >= max_datasets)
+            or (max_rows and kept_rows > max_rows)
+            or (cutoff and uploaded_at < cutoff)
+        ):
+            expired.append(dataset_id)
+            kept_rows -= rows
+        elif base_id is not None:
+            kept_bases.add(base_id)
+    # A delta's rows live partly in its base, so bases of kept deltas are kept too
+    return [dataset_id for dataset_id in expired if dataset_id not in kept_bases]
+
+
+def delete_datasets(dataset_ids):
+    """Delete datasets and everything hanging off them, returning the equipment row count"""
+    # Children go first as bulk deletes; none have signals or dependants of their own, so
+    # Django issues a single DELETE for each instead of collecting rows into Python.
+    with transaction.atomic():
+        rows, _ = EquipmentData.objects.filter(dataset_id__in=dataset_ids).delete()
+        RemovedEquipment.objects.filter(dataset_id__in=dataset_ids).delete()
+        ReportJob.objects.filter(dataset_id__in=dataset_ids).delete()
+        DatasetStatistics.objects.filter(dataset_id__in=dataset_ids).delete()
+        # Deltas go before the full datasets they point at, which are protected while referenced
+        EquipmentDataset.objects.filter(id__in=dataset_ids, base__isnull=False).delete()
+        EquipmentDataset.objects.filter(id__in=dataset_ids).delete()
+    for dataset_id in dataset_ids:
+        discard_report(dataset_id)
+        invalidate_dataset(dataset_id)
+    return rows
+
+
+def prune(policy=None):
+    """Apply the retention policy and return what was removed and how long it took"""
+    start = time.perf_counter()
+    dataset_ids = select_expired(**(policy or get_policy()))
+    rows = delete_datasets(dataset_ids) if dataset_ids else 0
+    result = {
+        'datasets': len(dataset_ids),
+        'rows': rows,
+        'seconds': round(time.perf_counter() - start, 4),
+    }
+    if dataset_ids:
+        logger.info('Pruned %(datasets)d datasets (%(rows)d rows) in %(seconds).3fs', result)
+    return result
+
+
+def _run_prune():
+    close_old_connections()
+    try:
+        prune()
+    except Exception:
+        logger.exception('Retention pruning failed')
+    finally:
+        close_old_connections()
+
+
+def schedule_prune():
+    """Prune now, or on the background worker when EQUIPMENT_RETENTION_BACKGROUND is set.
+
+    Returns the prune result when run inline and None when it was handed off.
+    """
+    if getattr(settings, 'EQUIPMENT_RETENTION_BACKGROUND', False):
+        get_executor().submit(_run_prune)
+        return None
+    return prune()
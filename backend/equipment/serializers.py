@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import EquipmentDataset, EquipmentData
+from .models import DatasetStatistics, EquipmentDataset, EquipmentData, ReportJob, UploadJob
 
 
 class EquipmentDataSerializer(serializers.ModelSerializer):
@@ -8,13 +8,29 @@ class EquipmentDataSerializer(serializers.ModelSerializer):
         fields = ['id', 'equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
 
 
-class EquipmentDatasetSerializer(serializers.ModelSerializer):
-    equipment = EquipmentDataSerializer(many=True, read_only=True)
-    
+class DatasetHeaderSerializer(serializers.ModelSerializer):
     class Meta:
         model = EquipmentDataset
         fields = ['id', 'filename', 'uploaded_at', 'total_count', 'avg_flowrate', 
-                  'avg_pressure', 'avg_temperature', 'equipment_type_distribution', 'equipment']
+                  'avg_pressure', 'avg_temperature', 'equipment_type_distribution', 'base']
+
+
+class EquipmentDatasetSerializer(DatasetHeaderSerializer):
+    equipment = serializers.SerializerMethodField()
+    
+    class Meta(DatasetHeaderSerializer.Meta):
+        fields = DatasetHeaderSerializer.Meta.fields + ['equipment']
+
+    def get_equipment(self, obj):
+        # Full datasets use the prefetched rows; deltas have to be resolved against their base
+        rows = obj.equipment.all() if obj.base_id is None else obj.equipment_rows()
+        return EquipmentDataSerializer(rows, many=True).data
+
+
+class DatasetStatisticsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DatasetStatistics
+        fields = ['parameters', 'by_type', 'top', 'sample_size', 'exact_percentiles']
 
 
 class DatasetSummarySerializer(serializers.Serializer):
@@ -23,3 +39,19 @@ class DatasetSummarySerializer(serializers.Serializer):
     avg_pressure = serializers.FloatField()
     avg_temperature = serializers.FloatField()
     equipment_type_distribution = serializers.DictField()
+    statistics = DatasetStatisticsSerializer()
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReportJob
+        fields = ['id', 'dataset', 'status', 'error', 'created_at', 'finished_at']
+
+
+class UploadJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadJob
+        fields = [
+            'id', 'filename', 'status', 'stage', 'bytes_total', 'bytes_parsed', 'rows_inserted',
+            'stage_seconds', 'dataset', 'result', 'error', 'created_at', 'updated_at', 'finished_at',
+        ]
@@ -0,0 +1,178 @@
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .models import DatasetStatistics
+
+
+PARAMETER_COLUMNS = {
+    'Flowrate': 'flowrate',
+    'Pressure': 'pressure',
+    'Temperature': 'temperature',
+}
+
+PERCENTILES = [25, 50, 75, 90]
+
+TOP_K = 10
+
+
+def get_sample_size():
+    return getattr(settings, 'EQUIPMENT_STATS_SAMPLE_SIZE', 100000)
+
+
+def _empty_moments():
+    return {'count': 0, 'mean': 0.0, 'm2': 0.0, 'min': None, 'max': None}
+
+
+def _merge_moments(state, count, mean, m2, minimum, maximum):
+    """Combine a chunk's count/mean/sum of squared deviations into state (Chan et al.)"""
+    if not count:
+        return
+    total = state['count'] + count
+    delta = mean - state['mean']
+    state['mean'] += delta * count / total
+    state['m2'] += m2 + delta * delta * state['count'] * count / total
+    state['count'] = total
+    state['min'] = minimum if state['min'] is None else min(state['min'], minimum)
+    state['max'] = maximum if state['max'] is None else max(state['max'], maximum)
+
+
+def _describe_moments(state):
+    count = state['count']
+    return {
+        'count': count,
+        'mean': state['mean'] if count else None,
+        'std': float(np.sqrt(state['m2'] / count)) if count else None,
+        'min': state['min'],
+        'max': state['max'],
+    }
+
+
+class RunningStatistics:
+    """Descriptive statistics per parameter and per equipment type, accumulated chunk by chunk.
+
+    Moments, extremes and top-k lists are exact. Percentiles come from a uniform
+    sample of at most EQUIPMENT_STATS_SAMPLE_SIZE rows, so they are exact for
+    datasets up to that size and memory stays bounded beyond it.
+    """
+
+    def __init__(self, sample_size=None, seed=0):
+        self.sample_size = sample_size or get_sample_size()
+        self.rows = 0
+        self.parameters = {column: _empty_moments() for column in PARAMETER_COLUMNS}
+        self.by_type = {}
+        self.type_rows = {}
+        self.top = {column: pd.DataFrame(columns=['Equipment Name', column]) for column in PARAMETER_COLUMNS}
+        self._rng = np.random.default_rng(seed)
+        self._sample = np.empty((0, len(PARAMETER_COLUMNS)))
+        self._sample_keys = np.empty(0)
+
+    def update(self, chunk):
+        if chunk.empty:
+            return
+        self.rows += len(chunk)
+        columns = list(PARAMETER_COLUMNS)
+        values = chunk[columns].astype(float)
+
+        means = values.mean()
+        m2 = ((values - means) ** 2).sum()
+        counts, minimums, maximums = values.count(), values.min(), values.max()
+        for column in columns:
+            _merge_moments(
+                self.parameters[column], int(counts[column]), float(means[column]),
+                float(m2[column]), float(minimums[column]), float(maximums[column]),
+            )
+
+        types = chunk['Type'].astype(str)
+        grouped = values.groupby(types)
+        type_counts, type_means = grouped.count(), grouped.mean()
+        type_mins, type_maxs = grouped.min(), grouped.max()
+        type_m2 = ((values - grouped.transform('mean')) ** 2).groupby(types).sum()
+        for eq_type, size in grouped.size().items():
+            self.type_rows[eq_type] = self.type_rows.get(eq_type, 0) + int(size)
+            state = self.by_type.setdefault(eq_type, {column: _empty_moments() for column in columns})
+            for column in columns:
+                _merge_moments(
+                    state[column], int(type_counts.at[eq_type, column]), float(type_means.at[eq_type, column]),
+                    float(type_m2.at[eq_type, column]), float(type_mins.at[eq_type, column]),
+                    float(type_maxs.at[eq_type, column]),
+                )
+
+        for column in columns:
+            candidates = chunk[['Equipment Name', column]].dropna()
+            if len(self.top[column]):
+                candidates = pd.concat([self.top[column], candidates], ignore_index=True)
+            self.top[column] = candidates.nlargest(TOP_K, column)
+
+        self._update_sample(values.to_numpy())
+
+    def _update_sample(self, values):
+        # Bottom-k sampling: keep the rows with the smallest random keys seen so far,
+        # which is a uniform sample without replacement over everything ingested.
+        keys = np.concatenate([self._sample_keys, self._rng.random(len(values))])
+        sample = np.concatenate([self._sample, values])
+        if len(keys) > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+            keys, sample = keys[keep], sample[keep]
+        self._sample_keys, self._sample = keys, sample
+
+    def _percentiles(self, index):
+        column = self._sample[:, index]
+        column = column[~np.isnan(column)]
+        if not len(column):
+            return {f'p{p}': None for p in PERCENTILES}
+        values = np.percentile(column, PERCENTILES)
+        return {f'p{p}': float(v) for p, v in zip(PERCENTILES, values)}
+
+    def as_fields(self):
+        parameters = {}
+        for index, (column, name) in enumerate(PARAMETER_COLUMNS.items()):
+            parameters[name] = _describe_moments(self.parameters[column])
+            parameters[name].update(self._percentiles(index))
+
+        by_type = {}
+        for eq_type, state in sorted(self.by_type.items()):
+            by_type[eq_type] = {'count': self.type_rows[eq_type]}
+            for column, name in PARAMETER_COLUMNS.items():
+                by_type[eq_type][name] = _describe_moments(state[column])
+
+        top = {
+            name: [
+                {'equipment_name': str(eq_name), 'value': float(value)}
+                for eq_name, value in self.top[column].itertuples(index=False)
+            ]
+            for column, name in PARAMETER_COLUMNS.items()
+        }
+        return {
+            'parameters': parameters,
+            'by_type': by_type,
+            'top': top,
+            'sample_size': len(self._sample),
+            'exact_percentiles': len(self._sample) == self.rows,
+        }
+
+
+def compute_statistics(dataset, chunk_size=50000):
+    """Build and persist statistics for a dataset ingested before statistics existed"""
+    columns = ['equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
+    rows = dataset.equipment_rows().values_list(*columns).iterator(chunk_size=chunk_size)
+    stats = RunningStatistics()
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        stats.update(pd.DataFrame.from_records(
+            chunk, columns=['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+        ))
+    # Concurrent requests may compute the same statistics; the first row stored wins
+    statistics, _ = DatasetStatistics.objects.get_or_create(dataset=dataset, defaults=stats.as_fields())
+    return statistics
+
+
+def get_statistics(dataset):
+    try:
+        return dataset.statistics
+    except DatasetStatistics.DoesNotExist:
+        return compute_statistics(dataset)
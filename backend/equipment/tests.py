@@ -0,0 +1,465 @@
+import io
+import os
+import zipfile
+from datetime import timedelta
+from unittest import mock
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from . import caching
+from .models import DatasetStatistics, EquipmentData, EquipmentDataset, RemovedEquipment, UploadJob
+from .progress import STALE_ERROR, publish_job, upload_path
+from .retention import select_expired
+from .statistics import compute_statistics, get_statistics
+from .uploads import _run_job
+
+
+ROWS_PER_DATASET = 200
+
+# Five header-only datasets serialize to about 1.5 KB, whatever their row counts
+HISTORY_MAX_BYTES = 4096
+
+
+def create_datasets(count=5):
+    for i in range(count):
+        dataset = EquipmentDataset.objects.create(
+            filename=f'dataset_{i}.csv',
+            total_count=ROWS_PER_DATASET,
+            avg_flowrate=100.0,
+            avg_pressure=10.0,
+            avg_temperature=50.0,
+            equipment_type_distribution={'Pump': ROWS_PER_DATASET},
+        )
+        EquipmentData.objects.bulk_create(
+            EquipmentData(
+                dataset=dataset,
+                equipment_name=f'EQ-{row}',
+                equipment_type='Pump',
+                flowrate=100.0,
+                pressure=10.0,
+                temperature=50.0,
+            )
+            for row in range(ROWS_PER_DATASET)
+        )
+
+
+class HistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='secret')
+        create_datasets()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_history_is_header_only(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/history/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 5)
+        for dataset in response.json():
+            self.assertNotIn('equipment', dataset)
+        self.assertLess(len(response.content), HISTORY_MAX_BYTES)
+
+    def test_history_include_equipment_prefetches_rows(self):
+        # One query for the datasets and one for all their rows, not one per dataset
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/history/?include=equipment')
+        self.assertEqual(response.status_code, 200)
+        for dataset in response.json():
+            self.assertEqual(len(dataset['equipment']), ROWS_PER_DATASET)
+        self.assertGreater(len(response.content), HISTORY_MAX_BYTES)
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class DataCachingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='secret')
+        create_datasets(1)
+        cls.dataset = EquipmentDataset.objects.first()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cached_pages_keep_links_for_the_requesting_host(self):
+        url = f'/api/data/{self.dataset.id}/?page_size=10'
+        first = self.client.get(url, HTTP_HOST='internal:8000').json()
+        second = self.client.get(url, HTTP_HOST='api.example.com', secure=True).json()
+        self.assertTrue(first['next'].startswith('http://internal:8000/'))
+        self.assertTrue(second['next'].startswith('https://api.example.com/'))
+
+    @override_settings(EQUIPMENT_CACHE_TIMEOUT=60)
+    def test_payloads_are_cached_with_a_timeout(self):
+        with mock.patch.object(caching.cache, 'set', wraps=caching.cache.set) as cache_set:
+            self.client.get(f'/api/data/{self.dataset.id}/')
+        payload_sets = [call for call in cache_set.call_args_list if isinstance(call.args[1], bytes)]
+        self.assertEqual([call.args[2] for call in payload_sets], [60])
+
+    @override_settings(EQUIPMENT_CACHE_MAX_ITEM_BYTES=1024)
+    def test_oversized_payloads_are_not_cached(self):
+        with mock.patch.object(caching.cache, 'set', wraps=caching.cache.set) as cache_set:
+            response = self.client.get(f'/api/data/{self.dataset.id}/')
+        self.assertGreater(len(response.content), 1024)
+        self.assertFalse([call for call in cache_set.call_args_list if isinstance(call.args[1], bytes)])
+
+    def test_data_varies_on_accept(self):
+        url = f'/api/data/{self.dataset.id}/'
+        for _ in range(2):  # uncached, then cached
+            response = self.client.get(url, HTTP_ACCEPT='application/x-npz')
+            self.assertEqual(response['Content-Type'], 'application/x-npz')
+            self.assertIn('Accept', response['Vary'])
+
+
+class ComparisonTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='secret')
+        create_datasets(1)
+        cls.dataset = EquipmentDataset.objects.get()
+        # What a header-only CSV upload stores
+        cls.empty = EquipmentDataset.objects.create(
+            filename='empty.csv',
+            total_count=0,
+            avg_flowrate=0.0,
+            avg_pressure=0.0,
+            avg_temperature=0.0,
+            equipment_type_distribution={},
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_compare_with_empty_dataset(self):
+        for first, second in [(self.dataset, self.empty), (self.empty, self.dataset), (self.empty, self.empty)]:
+            response = self.client.get(f'/api/compare/{first.id}/{second.id}/')
+            self.assertEqual(response.status_code, 200)
+            equipment = response.json()['equipment']
+            self.assertEqual(equipment['matched'], 0)
+            self.assertEqual(equipment['largest_changes'], [])
+
+
+def make_csv(rows, name='equipment.csv'):
+    lines = ['Equipment Name,Type,Flowrate,Pressure,Temperature']
+    lines += [f'{equipment},{kind},{flowrate},{pressure},{temperature}'
+              for equipment, (kind, flowrate, pressure, temperature) in rows.items()]
+    return SimpleUploadedFile(name, ('\n'.join(lines) + '\n').encode(), content_type='text/csv')
+
+
+BASE_ROWS = {f'EQ-{i}': ('Pump', 100.0 + i, 10.0, 50.0) for i in range(5)}
+
+
+class DeltaUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='secret')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.base_id = self.upload(BASE_ROWS).json()['id']
+
+    def upload(self, rows, base_dataset_id=None):
+        data = {'file': make_csv(rows)}
+        if base_dataset_id is not None:
+            data['base_dataset_id'] = base_dataset_id
+        return self.client.post('/api/upload/', data, format='multipart')
+
+    def rows(self, dataset_id):
+        data = self.client.get(f'/api/data/{dataset_id}/').json()
+        return {row['equipment_name']: (row['equipment_type'], row['flowrate'], row['pressure'], row['temperature'])
+                for row in data}
+
+    def test_delta_counts_and_overlay(self):
+        rows = dict(BASE_ROWS)
+        rows['EQ-1'] = ('Pump', 999.0, 10.0, 50.0)
+        del rows['EQ-2']
+        rows['EQ-5'] = ('Valve', 5.0, 1.0, 20.0)
+        response = self.upload(rows, self.base_id)
+        self.assertEqual(response.status_code, 201)
+        payload = response.json()
+        self.assertEqual(
+            payload['delta'],
+            {'base': self.base_id, 'added': 1, 'changed': 1, 'removed': 1, 'unchanged': 3, 'stored_rows': 2},
+        )
+        self.assertEqual(self.rows(payload['id']), rows)
+        dataset = EquipmentDataset.objects.get(id=payload['id'])
+        self.assertEqual(dataset.total_count, len(rows))
+        self.assertAlmostEqual(dataset.avg_flowrate, sum(row[1] for row in rows.values()) / len(rows))
+        self.assertEqual(dataset.equipment_type_distribution, {'Pump': 4, 'Valve': 1})
+
+    def test_delta_of_a_delta_is_stored_against_the_full_dataset(self):
+        first = dict(BASE_ROWS)
+        first['EQ-1'] = ('Pump', 999.0, 10.0, 50.0)
+        del first['EQ-2']
+        first['EQ-5'] = ('Valve', 5.0, 1.0, 20.0)
+        first_id = self.upload(first, self.base_id).json()['id']
+
+        second = dict(first)
+        del second['EQ-5']
+        second['EQ-3'] = ('Pump', 103.0, 99.0, 50.0)
+        second['EQ-6'] = ('Mixer', 7.0, 2.0, 30.0)
+        payload = self.upload(second, first_id).json()
+        # Counts are against the delta it was uploaded on, storage against the full dataset
+        self.assertEqual(payload['delta'], {
+            'base': first_id, 'added': 1, 'changed': 1, 'removed': 1, 'unchanged': 3, 'stored_rows': 3,
+        })
+        dataset = EquipmentDataset.objects.get(id=payload['id'])
+        self.assertEqual(dataset.base_id, self.base_id)
+        self.assertEqual(set(dataset.removed_equipment.values_list('equipment_name', flat=True)), {'EQ-2'})
+        self.assertEqual(self.rows(payload['id']), second)
+        # The first delta still reads the same
+        self.assertEqual(self.rows(first_id), first)
+
+    def test_rejects_invalid_base_dataset_id(self):
+        response = self.upload(BASE_ROWS, 'abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('base_dataset_id', response.json()['error'])
+
+    def test_duplicate_names_name_the_upload(self):
+        lines = 'Equipment Name,Type,Flowrate,Pressure,Temperature\nEQ-0,Pump,1,1,1\nEQ-0,Pump,2,2,2\n'
+        upload = SimpleUploadedFile('dup.csv', lines.encode(), content_type='text/csv')
+        data = {'file': upload, 'base_dataset_id': self.base_id}
+        response = self.client.post('/api/upload/', data, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('the upload repeats EQ-0', response.json()['error'])
+
+
+class ReportJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='secret')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_rejects_invalid_dataset_id(self):
+        for dataset_id in ['abc', [1]]:
+            response = self.client.post('/api/reports/', {'dataset_id': dataset_id}, format='json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_unknown_dataset_is_not_found(self):
+        response = self.client.post('/api/reports/', {'dataset_id': 12345}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+class StatisticsTests(TestCase):
+    def test_lazy_statistics_tolerate_a_concurrent_request(self):
+        create_datasets(1)
+        dataset = EquipmentDataset.objects.get()
+        with self.assertRaises(DatasetStatistics.DoesNotExist):
+            dataset.statistics
+        # Another request stores the statistics after this one found none
+        stored = compute_statistics(EquipmentDataset.objects.get())
+        self.assertEqual(get_statistics(dataset).pk, stored.pk)
+        self.assertEqual(DatasetStatistics.objects.count(), 1)
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='secret')
+        cls.staff = User.objects.create_user('admin', password='secret', is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    @override_settings(EQUIPMENT_SERVER_TIMING=False)
+    def test_server_timing_is_off_unless_enabled(self):
+        response = self.client.get('/api/history/')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(EQUIPMENT_SERVER_TIMING=True)
+    def test_server_timing_when_enabled(self):
+        self.client.force_authenticate(self.user)
+        self.assertIn('db;', self.client.get('/api/history/')['Server-Timing'])
+
+    def test_only_staff_reset_metrics(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.delete('/api/metrics/').status_code, 403)
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.delete('/api/metrics/').status_code, 204)
+
+
+class RetentionTests(TestCase):
+    def test_row_budget_counts_rows_a_delta_stores(self):
+        create_datasets(2)
+        base, newest = EquipmentDataset.objects.order_by('id')
+        now = timezone.now()
+        EquipmentDataset.objects.filter(id=base.id).update(uploaded_at=now - timedelta(hours=2))
+        # Between base and newest: a delta storing 5 changed rows and 5 removed names
+        delta = EquipmentDataset.objects.create(
+            filename='delta.csv',
+            base=base,
+            uploaded_at=now - timedelta(hours=1),
+            total_count=ROWS_PER_DATASET,
+            avg_flowrate=100.0,
+            avg_pressure=10.0,
+            avg_temperature=50.0,
+            equipment_type_distribution={'Pump': ROWS_PER_DATASET},
+        )
+        EquipmentData.objects.bulk_create(
+            EquipmentData(dataset=delta, equipment_name=f'EQ-{row}', equipment_type='Pump',
+                          flowrate=1.0, pressure=1.0, temperature=1.0)
+            for row in range(5)
+        )
+        RemovedEquipment.objects.bulk_create(
+            RemovedEquipment(dataset=delta, equipment_name=f'EQ-{row}') for row in range(5, 10)
+        )
+        # newest (200) plus the delta's 10 stored rows fit; counting its 200 logical rows would not
+        self.assertEqual(select_expired(max_rows=ROWS_PER_DATASET + 50), [])
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return SimpleUploadedFile('batch.zip', buffer.getvalue(), content_type='application/zip')
+
+
+class BatchLimitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='secret')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post_rejected(self, upload):
+        # Limits come from the zip directory, so no member may be decompressed first
+        with mock.patch.object(zipfile.ZipFile, 'read', side_effect=AssertionError('member read')):
+            response = self.client.post('/api/upload/batch/', {'files': [upload]}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(EquipmentDataset.objects.exists())
+        return response.json()['error']
+
+    @override_settings(EQUIPMENT_BATCH_MAX_FILES=2)
+    def test_rejects_zip_with_too_many_members(self):
+        upload = make_zip({f'file_{i}.csv': 'Equipment Name\n' for i in range(3)})
+        self.assertIn('Too many files', self.post_rejected(upload))
+
+    @override_settings(EQUIPMENT_BATCH_MAX_BYTES=1024 * 1024)
+    def test_rejects_zip_expanding_past_the_byte_cap(self):
+        # About 10 KB compressed, 2 MB once extracted
+        upload = make_zip({'big.csv': 'x' * (2 * 1024 * 1024)})
+        self.assertLess(upload.size, 64 * 1024)
+        self.assertIn('Batch too large', self.post_rejected(upload))
+
+
+class UploadEventsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='secret')
+        cls.job = UploadJob.objects.create(filename='pending.csv')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def abandon_job(self):
+        # A running job whose process died: its last progress is in the cache and its upload on disk
+        job = UploadJob.objects.create(
+            filename='abandoned.csv', status=UploadJob.RUNNING, updated_at=timezone.now() - timedelta(hours=1)
+        )
+        publish_job(job)
+        with open(upload_path(job.id), 'wb') as f:
+            f.write(b'Equipment Name\n')
+        return job
+
+    def test_stale_job_is_failed_and_its_upload_removed(self):
+        job = self.abandon_job()
+        state = self.client.get(f'/api/uploads/{job.id}/').json()
+        self.assertEqual(state['status'], UploadJob.FAILED)
+        self.assertEqual(state['error'], STALE_ERROR)
+        self.assertFalse(os.path.exists(upload_path(job.id)))
+
+    def test_stream_of_stale_job_ends_with_failed(self):
+        job = self.abandon_job()
+        response = self.client.get(f'/api/uploads/{job.id}/events/', HTTP_ACCEPT='text/event-stream')
+        self.assertIn('event: failed', b''.join(response.streaming_content).decode())
+
+    def test_worker_skips_job_failed_while_queued(self):
+        job = UploadJob.objects.create(filename='late.csv', status=UploadJob.FAILED, error=STALE_ERROR)
+        _run_job(job.id, {})
+        job.refresh_from_db()
+        self.assertEqual(job.status, UploadJob.FAILED)
+
+    @override_settings(EQUIPMENT_SYNC_UPLOAD_EVENTS_TIMEOUT=0, EQUIPMENT_UPLOAD_EVENTS_TIMEOUT=600)
+    def test_sync_stream_closes_before_the_job_finishes(self):
+        # A pending job would keep the stream, and its WSGI worker, busy for the full timeout
+        response = self.client.get(f'/api/uploads/{self.job.id}/events/', HTTP_ACCEPT='text/event-stream')
+        events = b''.join(response.streaming_content).decode()
+        self.assertIn('event: progress', events)
+        self.assertNotIn('event: done', events)
+
+
+class AsyncDataTests(TransactionTestCase):
+    # The async views query from executor threads, which can't see a TestCase's open transaction
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user('tester', password='secret')
+        token = Token.objects.create(user=user)
+        create_datasets(1)
+        self.dataset = EquipmentDataset.objects.get()
+        self.client = AsyncClient()
+        self.headers = {'Authorization': f'Token {token.key}'}
+
+    def get(self, url, **headers):
+        return self.client.get(url, headers={**self.headers, **headers})
+
+    async def test_async_data_pages_with_cursor(self):
+        response = await self.get(f'/api/async/data/{self.dataset.id}/?page_size=50')
+        self.assertEqual(response.status_code, 200)
+        page = response.json()
+        self.assertEqual(len(page['results']), 50)
+        response = await self.get(page['next'])
+        self.assertEqual(len(response.json()['results']), 50)
+
+    async def test_async_data_renders_npz(self):
+        for url, headers in [
+            (f'/api/async/data/{self.dataset.id}/?format=npz', {}),
+            (f'/api/async/data/{self.dataset.id}/', {'Accept': 'application/x-npz'}),
+        ]:
+            response = await self.get(url, **headers)
+            self.assertEqual(response['Content-Type'], 'application/x-npz')
+            columns = np.load(io.BytesIO(response.content))
+            self.assertEqual(len(columns['flowrate']), ROWS_PER_DATASET)
+
+    async def test_async_summary_revalidates_with_etag(self):
+        url = f'/api/async/summary/{self.dataset.id}/'
+        response = await self.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_count'], ROWS_PER_DATASET)
+        response = await self.get(url, **{'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_async_history_matches_sync(self):
+        sync_client = APIClient()
+        sync_client.force_authenticate(await User.objects.aget())
+        for url in ['history/', 'history/?include=equipment']:
+            response = await self.get(f'/api/async/{url}')
+            expected = await sync_to_async(sync_client.get)(f'/api/{url}')
+            self.assertEqual(response.json(), expected.json())
+
+    async def test_async_data_rejects_bad_cursor(self):
+        response = await self.get(f'/api/async/data/{self.dataset.id}/?cursor=bogus')
+        self.assertEqual(response.status_code, 404)
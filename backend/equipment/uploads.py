@@ -0,0 +1,147 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections
+from django.utils import timezone
+from rest_framework import status
+
+from .caching import invalidate_dataset
+from .delta import delta_ingest
+from .ingest import IngestTimer, hash_upload, stream_ingest
+from .models import EquipmentDataset, UploadJob
+from .progress import UploadProgress, fail_stale_jobs, publish_job, remove_upload, upload_path
+from .retention import schedule_prune
+from .serializers import DatasetHeaderSerializer
+
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'EQUIPMENT_UPLOAD_WORKERS', 2),
+            thread_name_prefix='equipment-upload',
+        )
+    return _executor
+
+
+def validate_upload(files, data):
+    """Return an error message unless files holds a CSV upload and any base_dataset_id is an id"""
+    if 'file' not in files:
+        return 'No file provided'
+    if not files['file'].name.endswith('.csv'):
+        return 'Invalid file type. Please upload a CSV file.'
+    if data.get('base_dataset_id'):
+        try:
+            int(data['base_dataset_id'])
+        except (TypeError, ValueError):
+            return f'Invalid base_dataset_id "{data["base_dataset_id"]}"'
+    return None
+
+
+def process_upload(files, data, progress=None):
+    """Validate and ingest an uploaded CSV, returning (payload, status code).
+
+    Shared by the DRF view, the async view and upload jobs, which run it on a worker thread.
+    """
+    error = validate_upload(files, data)
+    if error:
+        return {'error': error}, status.HTTP_400_BAD_REQUEST
+
+    csv_file = files['file']
+    progress = progress or UploadProgress(bytes_total=csv_file.size)
+
+    base = None
+    if data.get('base_dataset_id'):
+        base = EquipmentDataset.objects.filter(id=int(data['base_dataset_id'])).first()
+        if base is None:
+            return {'error': 'Dataset not found'}, status.HTTP_404_NOT_FOUND
+
+    progress.enter('hash')
+    content_hash = hash_upload(csv_file)
+    existing = EquipmentDataset.objects.filter(content_hash=content_hash).first()
+    if existing is not None:
+        payload = dict(DatasetHeaderSerializer(existing).data)
+        payload['duplicate'] = True
+        return payload, status.HTTP_200_OK
+
+    try:
+        delta = None
+        with IngestTimer() as timer:
+            if base is None:
+                dataset, timer.rows = stream_ingest(
+                    csv_file, csv_file.name, content_hash=content_hash, progress=progress
+                )
+            else:
+                dataset, timer.rows, delta = delta_ingest(
+                    csv_file, csv_file.name, base, content_hash=content_hash, progress=progress
+                )
+        invalidate_dataset(dataset.id)
+
+        progress.enter('prune')
+        retention = schedule_prune()
+
+        payload = dict(DatasetHeaderSerializer(dataset).data)
+        payload['duplicate'] = False
+        payload['ingest'] = timer.as_dict()
+        if delta is not None:
+            payload['delta'] = delta
+        if retention is not None:
+            payload['retention'] = retention
+        return payload, status.HTTP_201_CREATED
+
+    except Exception as e:
+        return {'error': str(e)}, status.HTTP_400_BAD_REQUEST
+
+
+def _run_job(job_id, data):
+    close_old_connections()
+    try:
+        # A job that waited in the queue past the stale limit has already been failed
+        if not UploadJob.objects.filter(id=job_id, status=UploadJob.PENDING).update(
+            status=UploadJob.RUNNING, updated_at=timezone.now()
+        ):
+            return
+        job = UploadJob.objects.get(id=job_id)
+        progress = UploadProgress(job, bytes_total=job.bytes_total)
+        try:
+            with open(upload_path(job_id), 'rb') as f:
+                payload, status_code = process_upload({'file': File(f, name=job.filename)}, data, progress)
+        except Exception as e:
+            payload, status_code = {'error': str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR
+        progress.finish()
+        if status.is_success(status_code):
+            job.status = UploadJob.DONE
+            job.dataset_id = payload['id']
+            job.result = payload
+        else:
+            job.status = UploadJob.FAILED
+            job.error = payload['error']
+        job.updated_at = job.finished_at = timezone.now()
+        job.save()
+        publish_job(job)
+    except UploadJob.DoesNotExist:
+        pass
+    finally:
+        remove_upload(job_id)
+        close_old_connections()
+
+
+def submit_upload_job(uploaded_file, data):
+    """Create an UploadJob and ingest the file on the worker pool.
+
+    The upload is copied to a temporary file first, since Django discards uploaded
+    files once the request that carried them finishes. Jobs abandoned by a process that
+    died are failed and their copies removed on the way.
+    """
+    fail_stale_jobs()
+    job = UploadJob.objects.create(filename=uploaded_file.name, bytes_total=uploaded_file.size)
+    with open(upload_path(job.id), 'wb') as output:
+        for chunk in uploaded_file.chunks():
+            output.write(chunk)
+    publish_job(job)
+    get_executor().submit(_run_job, job.id, {'base_dataset_id': data.get('base_dataset_id')})
+    return job
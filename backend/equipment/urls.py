@@ -2,12 +2,22 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
+    path('login/', views.login, name='login'),
     path('upload/', views.upload_csv, name='upload_csv'),
+    path('upload/batch/', views.upload_batch, name='upload_batch'),
+    path('uploads/', views.create_upload_job, name='create_upload_job'),
+    path('uploads/<int:job_id>/', views.get_upload_job, name='get_upload_job'),
+    path('uploads/<int:job_id>/events/', views.upload_job_events, name='upload_job_events'),
     path('summary/', views.get_summary, name='get_summary'),
     path('summary/<int:dataset_id>/', views.get_summary, name='get_summary_by_id'),
     path('data/', views.get_data, name='get_data'),
     path('data/<int:dataset_id>/', views.get_data, name='get_data_by_id'),
     path('history/', views.get_history, name='get_history'),
+    path('compare/<int:dataset_id1>/<int:dataset_id2>/', views.get_comparison, name='get_comparison'),
     path('pdf/', views.generate_pdf, name='generate_pdf'),
     path('pdf/<int:dataset_id>/', views.generate_pdf, name='generate_pdf_by_id'),
+    path('reports/', views.create_report_job, name='create_report_job'),
+    path('reports/<int:job_id>/', views.get_report_job, name='get_report_job'),
+    path('reports/<int:job_id>/file/', views.download_report, name='download_report'),
+    path('metrics/', views.get_metrics, name='get_metrics'),
 ]
@@ -1,18 +1,33 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.authtoken.models import Token
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, renderer_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.response import Response
-from django.http import HttpResponse
-import pandas as pd
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
+from django.contrib.auth import authenticate
+from django.http import FileResponse, StreamingHttpResponse
 
-from .models import EquipmentDataset, EquipmentData
-from .serializers import EquipmentDatasetSerializer, EquipmentDataSerializer, DatasetSummarySerializer
+from .batch import process_batch
+from .caching import cached_response, dataset_etag, not_modified
+from .columnar import NpzRenderer, build_columns
+from .comparison import compare_datasets, get_limit
+from .events import EVENT_STREAM_CONTENT_TYPE, EventStreamRenderer, get_sync_events_timeout, upload_events
+from .filters import filter_equipment, get_ordering
+from .metrics import registry
+from .models import EquipmentDataset, ReportJob, UploadJob
+from .progress import get_upload_state
+from .pagination import EquipmentCursorPagination
+from .reports import ensure_report, report_filename, report_path, submit_report_job
+from .serializers import (
+    DatasetHeaderSerializer,
+    DatasetSummarySerializer,
+    EquipmentDataSerializer,
+    EquipmentDatasetSerializer,
+    ReportJobSerializer,
+    UploadJobSerializer,
+)
+from .statistics import get_statistics
+from .uploads import process_upload, submit_upload_job, validate_upload
 
 
 def _get_dataset(dataset_id=None):
@@ -27,69 +42,35 @@ def _get_dataset(dataset_id=None):
     return dataset, None
 
 
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def login(request):
+    """Exchange a username and password for an API token so later requests skip password hashing"""
+    user = authenticate(
+        request,
+        username=request.data.get('username'),
+        password=request.data.get('password'),
+    )
+    if user is None:
+        return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+    token, _ = Token.objects.get_or_create(user=user)
+    return Response({'token': token.key, 'username': user.get_username()})
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def upload_csv(request):
-    print(f"Upload request received: {request.method}")
-    print(f"Files: {request.FILES}")
-    print(f"Headers: {request.headers}")
-    
-    if 'file' not in request.FILES:
-        return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    csv_file = request.FILES['file']
-    
-    if not csv_file.name.endswith('.csv'):
-        return Response({'error': 'Invalid file type. Please upload a CSV file.'}, 
-                       status=status.HTTP_400_BAD_REQUEST)
-    
-    try:
-        df = pd.read_csv(csv_file)
-        
-        required_columns = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            return Response({
-                'error': f'Missing required columns: {", ".join(missing_columns)}'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        total_count = len(df)
-        avg_flowrate = df['Flowrate'].mean()
-        avg_pressure = df['Pressure'].mean()
-        avg_temperature = df['Temperature'].mean()
-        
-        type_distribution = df['Type'].value_counts().to_dict()
-        
-        dataset = EquipmentDataset.objects.create(
-            filename=csv_file.name,
-            total_count=total_count,
-            avg_flowrate=float(avg_flowrate),
-            avg_pressure=float(avg_pressure),
-            avg_temperature=float(avg_temperature),
-            equipment_type_distribution=type_distribution
-        )
-        
-        for _, row in df.iterrows():
-            EquipmentData.objects.create(
-                dataset=dataset,
-                equipment_name=row['Equipment Name'],
-                equipment_type=row['Type'],
-                flowrate=float(row['Flowrate']),
-                pressure=float(row['Pressure']),
-                temperature=float(row['Temperature'])
-            )
-        
-        all_datasets = EquipmentDataset.objects.all().order_by('-uploaded_at')
-        if all_datasets.count() > 5:
-            datasets_to_delete = all_datasets[5:]
-            for ds in datasets_to_delete:
-                ds.delete()
-        
-        serializer = EquipmentDatasetSerializer(dataset)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
-        
-    except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    payload, status_code = process_upload(request.FILES, request.data)
+    return Response(payload, status=status_code)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def upload_batch(request):
+    """Ingest several CSV files or zip archives sent as `files` in one request, with per-file results"""
+    payload, status_code = process_batch(request.FILES.getlist('files') + request.FILES.getlist('file'))
+    return Response(payload, status=status_code)
 
 
 @api_view(['GET'])
@@ -98,32 +79,71 @@ def get_summary(request, dataset_id=None):
     dataset, err = _get_dataset(dataset_id)
     if err:
         return err
+    return cached_response(request, dataset, 'summary', lambda: build_summary(dataset))
+
+
+def build_summary(dataset):
     data = {
         'total_count': dataset.total_count,
         'avg_flowrate': dataset.avg_flowrate,
         'avg_pressure': dataset.avg_pressure,
         'avg_temperature': dataset.avg_temperature,
         'equipment_type_distribution': dataset.equipment_type_distribution,
+        'statistics': get_statistics(dataset),
     }
-    return Response(DatasetSummarySerializer(data).data)
+    return DatasetSummarySerializer(data).data
+
+
+def build_data(request, dataset):
+    """Equipment rows of dataset for a negotiated DRF request: columns, a cursor page or the full list"""
+    ordering = get_ordering(request.query_params)
+    queryset = filter_equipment(dataset.equipment_rows(), request.query_params)
+    if request.accepted_renderer.format == NpzRenderer.format:
+        return build_columns(queryset.order_by(*ordering))
+    if 'cursor' in request.query_params or 'page_size' in request.query_params:
+        paginator = EquipmentCursorPagination(ordering)
+        page = paginator.paginate_queryset(queryset, request)
+        serializer = EquipmentDataSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data).data
+    return EquipmentDataSerializer(queryset.order_by(*ordering), many=True).data
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, BrowsableAPIRenderer, NpzRenderer])
 def get_data(request, dataset_id=None):
     dataset, err = _get_dataset(dataset_id)
     if err:
         return err
-    serializer = EquipmentDataSerializer(dataset.equipment.all(), many=True)
-    return Response(serializer.data)
+
+    return cached_response(request, dataset, 'data', lambda: build_data(request, dataset))
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_history(request):
-    datasets = EquipmentDataset.objects.all()[:5]
-    serializer = EquipmentDatasetSerializer(datasets, many=True)
-    return Response(serializer.data)
+    return Response(build_history(request.query_params))
+
+
+def build_history(params):
+    """The last 5 datasets, with their rows prefetched in one query for ?include=equipment"""
+    datasets = EquipmentDataset.objects.all()
+    if 'equipment' in params.get('include', '').split(','):
+        return EquipmentDatasetSerializer(datasets.prefetch_related('equipment')[:5], many=True).data
+    return DatasetHeaderSerializer(datasets[:5], many=True).data
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_comparison(request, dataset_id1, dataset_id2):
+    """Compare two datasets server-side so clients don't download and diff both row sets"""
+    dataset1, err = _get_dataset(dataset_id1)
+    if err:
+        return err
+    dataset2, err = _get_dataset(dataset_id2)
+    if err:
+        return err
+    return Response(compare_datasets(dataset1, dataset2, get_limit(request.query_params)))
 
 
 @api_view(['GET'])
@@ -132,106 +152,120 @@ def generate_pdf(request, dataset_id=None):
     dataset, err = _get_dataset(dataset_id)
     if err:
         return err
+    etag = dataset_etag(dataset, 'pdf')
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    path = ensure_report(dataset)
+    response = FileResponse(open(path, 'rb'), as_attachment=True, filename=report_filename(dataset.id))
+    response['ETag'] = etag
+    return response
 
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    story = []
-    
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#1a237e'),
-        spaceAfter=30,
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.HexColor('#283593'),
-        spaceAfter=12,
-    )
-    
-    story.append(Paragraph("Chemical Equipment Parameter Report", title_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    story.append(Paragraph(f"<b>Dataset:</b> {dataset.filename}", styles['Normal']))
-    story.append(Paragraph(f"<b>Uploaded:</b> {dataset.uploaded_at.strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
-    story.append(Spacer(1, 0.3*inch))
-    
-    story.append(Paragraph("Summary Statistics", heading_style))
-    summary_data = [
-        ['Metric', 'Value'],
-        ['Total Equipment Count', str(dataset.total_count)],
-        ['Average Flowrate', f"{dataset.avg_flowrate:.2f}"],
-        ['Average Pressure', f"{dataset.avg_pressure:.2f}"],
-        ['Average Temperature', f"{dataset.avg_temperature:.2f}"],
-    ]
-    summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3949ab')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    story.append(summary_table)
-    story.append(Spacer(1, 0.3*inch))
-    
-    story.append(Paragraph("Equipment Type Distribution", heading_style))
-    type_data = [['Equipment Type', 'Count']]
-    for eq_type, count in dataset.equipment_type_distribution.items():
-        type_data.append([eq_type, str(count)])
-    
-    type_table = Table(type_data, colWidths=[3*inch, 2*inch])
-    type_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3949ab')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    story.append(type_table)
-    story.append(Spacer(1, 0.3*inch))
-    
-    story.append(Paragraph("Equipment Details", heading_style))
-    equipment_list = dataset.equipment.all()
-    equipment_data = [['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']]
-    for eq in equipment_list:
-        equipment_data.append([
-            eq.equipment_name,
-            eq.equipment_type,
-            f"{eq.flowrate:.2f}",
-            f"{eq.pressure:.2f}",
-            f"{eq.temperature:.2f}"
-        ])
-    
-    equipment_table = Table(equipment_data, colWidths=[1.5*inch, 1.2*inch, 0.8*inch, 0.8*inch, 0.8*inch])
-    equipment_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3949ab')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 9),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-    ]))
-    story.append(equipment_table)
-    
-    doc.build(story)
-    buffer.seek(0)
-    
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="equipment_report_{dataset.id}.pdf"'
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_report_job(request):
+    dataset_id = request.data.get('dataset_id')
+    if dataset_id not in (None, ''):
+        try:
+            dataset_id = int(dataset_id)
+        except (TypeError, ValueError):
+            return Response({'error': f'Invalid dataset_id "{dataset_id}"'}, status=status.HTTP_400_BAD_REQUEST)
+    dataset, err = _get_dataset(dataset_id)
+    if err:
+        return err
+    job = submit_report_job(dataset)
+    return Response(ReportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+def _get_report_job(job_id):
+    try:
+        return ReportJob.objects.get(id=job_id), None
+    except ReportJob.DoesNotExist:
+        return None, Response({'error': 'Report job not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_report_job(request, job_id):
+    job, err = _get_report_job(job_id)
+    if err:
+        return err
+    return Response(ReportJobSerializer(job).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_report(request, job_id):
+    job, err = _get_report_job(job_id)
+    if err:
+        return err
+    if job.status != ReportJob.DONE:
+        return Response({'error': f'Report is not ready (status: {job.status})'}, status=status.HTTP_409_CONFLICT)
+    etag = dataset_etag(job.dataset, 'pdf')
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    path = report_path(job.dataset_id)
+    response = FileResponse(open(path, 'rb'), as_attachment=True, filename=report_filename(job.dataset_id))
+    response['ETag'] = etag
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_upload_job(request):
+    """Start ingesting an upload in the background; follow it at uploads/<id>/events/"""
+    error = validate_upload(request.FILES, request.data)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    job = submit_upload_job(request.FILES['file'], request.data)
+    return Response(UploadJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+def _get_upload_job(job_id):
+    try:
+        return UploadJob.objects.get(id=job_id), None
+    except UploadJob.DoesNotExist:
+        return None, Response({'error': 'Upload job not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_upload_job(request, job_id):
+    job, err = _get_upload_job(job_id)
+    if err:
+        return err
+    return Response(get_upload_state(job.id))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([EventStreamRenderer, JSONRenderer])
+def upload_job_events(request, job_id):
+    """Stream upload progress as Server-Sent Events until the job finishes.
+
+    The stream ties up a WSGI worker, so it closes after EQUIPMENT_SYNC_UPLOAD_EVENTS_TIMEOUT
+    and clients reconnect. Long-lived streams belong on the ASGI route /api/async/uploads/<id>/events/.
+    """
+    job, err = _get_upload_job(job_id)
+    if err:
+        return err
+    events = upload_events(job.id, get_sync_events_timeout())
+    response = StreamingHttpResponse(events, content_type=EVENT_STREAM_CONTENT_TYPE)
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
     return response
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def get_metrics(request):
+    """Per-endpoint request timing percentiles for this server process; staff can DELETE to reset them"""
+    if request.method == 'DELETE':
+        if not request.user.is_staff:
+            return Response({'error': 'Only staff can reset metrics'}, status=status.HTTP_403_FORBIDDEN)
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(registry.snapshot())
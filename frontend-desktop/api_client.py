@@ -0,0 +1,218 @@
+import json
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+
+API_BASE_URL = 'http://localhost:8000/api'
+MAX_WORKERS = 4
+# Seconds to wait for a connection, and for the server to send more data
+REQUEST_TIMEOUT = (5, 60)
+# Kept-alive connections: one per worker plus the upload progress stream
+POOL_SIZE = MAX_WORKERS + 2
+
+# Result of a cached request whose cached copy, already delivered, is still current
+NOT_MODIFIED = object()
+
+
+class ApiError(Exception):
+    """The server answered with an error status"""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def create_session():
+    """Session with pooled keep-alive connections, retrying failed connections and gateway errors.
+
+    Reads are retried only for GETs, since repeating a POST could upload or queue work twice.
+    requests already sends Accept-Encoding: gzip, deflate and decompresses the body.
+    """
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def json_body(response):
+    if response.status_code >= 400:
+        try:
+            message = response.json().get('error') or response.reason
+        except ValueError:
+            message = response.reason
+        raise ApiError(response.status_code, f'Error {response.status_code}: {message}')
+    return response.json()
+
+
+class RequestSignals(QObject):
+    cached = pyqtSignal(object, object)
+    finished = pyqtSignal(object, object, object)
+
+
+class ApiRequest(QRunnable):
+    """One HTTP request run on the thread pool.
+
+    `handler` turns the response into the result on the worker thread, so decoding
+    large bodies never blocks the GUI. Requests given a `cache` use `decode` on the body
+    instead, since the body may come from the cache.
+    """
+
+    def __init__(self, session, method, url, handler=json_body, cache=None, decode=json.loads, **kwargs):
+        super().__init__()
+        self.session = session
+        self.method = method
+        self.url = url
+        self.handler = handler
+        self.cache = cache
+        self.decode = decode
+        self.kwargs = kwargs
+        self.cancelled = False
+        self.signals = RequestSignals()
+        # The client keeps each request alive until its finished signal arrives
+        self.setAutoDelete(False)
+
+    def run(self):
+        if self.cancelled:
+            self.signals.finished.emit(self, None, None)
+            return
+        try:
+            result = self.fetch() if self.cache is None else self.fetch_cached()
+        except Exception as e:
+            self.signals.finished.emit(self, None, e)
+            return
+        self.signals.finished.emit(self, result, None)
+
+    def fetch(self):
+        with self.session.request(self.method, self.url, timeout=REQUEST_TIMEOUT, **self.kwargs) as response:
+            return self.handler(response)
+
+    def fetch_cached(self):
+        """Deliver the cached body at once, then revalidate it with If-None-Match.
+
+        Returns NOT_MODIFIED if the cached copy is current, or if the server cannot be
+        reached or fails, so a cached dataset still opens offline.
+        """
+        key = requests.Request('GET', self.url, params=self.kwargs.get('params')).prepare().url
+        entry = self.cache.get(key)
+        headers = {}
+        if entry is not None:
+            etag, body = entry
+            self.signals.cached.emit(self, self.decode(body))
+            if etag:
+                headers['If-None-Match'] = etag
+        try:
+            response = self.session.get(self.url, headers=headers, timeout=REQUEST_TIMEOUT, **self.kwargs)
+        except requests.RequestException:
+            if entry is None:
+                raise
+            return NOT_MODIFIED
+        if response.status_code == 304:
+            return NOT_MODIFIED
+        if response.status_code >= 400:
+            if entry is not None and response.status_code >= 500:
+                return NOT_MODIFIED
+            # The dataset was deleted from the server; other errors such as an expired
+            # token say nothing about the cached copy
+            if response.status_code == 404:
+                self.cache.discard(key)
+            json_body(response)
+        body = response.content
+        if entry is not None and body == entry[1]:
+            return NOT_MODIFIED
+        self.cache.put(key, response.headers.get('ETag'), body)
+        return self.decode(body)
+
+
+class ApiClient(QObject):
+    """Runs API requests on a thread pool and calls back on the GUI thread.
+
+    Every request belongs to a named slot such as 'summary' or 'data'. Starting a request
+    in a slot cancels the one already there: a queued request is dropped and the result
+    of one in flight is discarded, so a slow response for a dataset the user has moved
+    away from never overwrites the current view.
+
+    GETs made with cached=True are served from `cache` first and then revalidated; their
+    success callback runs a second time only if the server has a newer response.
+    """
+
+    def __init__(self, base_url=API_BASE_URL, cache=None, parent=None):
+        super().__init__(parent)
+        self.base_url = base_url
+        self.cache = cache
+        self.session = create_session()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(MAX_WORKERS)
+        self._active = {}
+        self._pending = {}
+
+    def set_token(self, token):
+        if token:
+            self.session.headers['Authorization'] = f'Token {token}'
+        else:
+            self.session.headers.pop('Authorization', None)
+
+    def url(self, path):
+        return path if path.startswith('http') else f'{self.base_url}/{path}'
+
+    def request(self, slot, method, path, on_success, on_error, handler=json_body, cached=False, **kwargs):
+        self.cancel(slot)
+        cache = self.cache if cached else None
+        request = ApiRequest(self.session, method, self.url(path), handler, cache, **kwargs)
+        request.signals.cached.connect(self._cached)
+        request.signals.finished.connect(self._finished)
+        self._active[slot] = request
+        self._pending[request] = (slot, on_success, on_error)
+        self.pool.start(request)
+        return request
+
+    def get(self, slot, path, on_success, on_error, **kwargs):
+        return self.request(slot, 'GET', path, on_success, on_error, **kwargs)
+
+    def post(self, slot, path, on_success, on_error, **kwargs):
+        return self.request(slot, 'POST', path, on_success, on_error, **kwargs)
+
+    def cancel(self, slot):
+        request = self._active.pop(slot, None)
+        if request is not None:
+            request.cancelled = True
+            if self.pool.tryTake(request):
+                del self._pending[request]
+
+    def cancel_all(self):
+        for slot in list(self._active):
+            self.cancel(slot)
+
+    def shutdown(self, wait_ms=2000):
+        self.cancel_all()
+        self.pool.waitForDone(wait_ms)
+        self.session.close()
+
+    @pyqtSlot(object, object)
+    def _cached(self, request, result):
+        callbacks = self._pending.get(request)
+        if callbacks is not None and not request.cancelled:
+            callbacks[1](result)
+
+    @pyqtSlot(object, object, object)
+    def _finished(self, request, result, error):
+        slot, on_success, on_error = self._pending.pop(request)
+        if request.cancelled:
+            return
+        del self._active[slot]
+        if result is NOT_MODIFIED:
+            return
+        if error is None:
+            on_success(result)
+        else:
+            on_error(error)
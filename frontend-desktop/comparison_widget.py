@@ -1,5 +1,4 @@
 import sys
-import requests
 from datetime import datetime
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, 
@@ -10,8 +9,6 @@ from PyQt5.QtGui import QFont
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
-API_BASE_URL = 'http://localhost:8000/api'
-
 class ComparisonChartWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -37,14 +34,13 @@ class ComparisonChartWidget(QWidget):
         self.canvas.draw()
 
 class ComparisonWidget(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, api, parent=None):
         super().__init__(parent)
-        self.dataset1_data = None
-        self.dataset2_data = None
+        self.api = api
         self.dataset1_summary = None
         self.dataset2_summary = None
+        self.equipment_comparison = None
         self.history_data = []
-        self.auth_header = None
         self.init_ui()
     
     def init_ui(self):
@@ -94,9 +90,6 @@ class ComparisonWidget(QWidget):
         
         self.setLayout(layout)
     
-    def set_auth_header(self, auth_header):
-        self.auth_header = auth_header
-    
     def load_history(self, history_data):
         self.history_data = history_data
         
@@ -118,39 +111,17 @@ class ComparisonWidget(QWidget):
         dataset1_id = self.dataset1_combo.currentData()
         dataset2_id = self.dataset2_combo.currentData()
         
-        # Find the datasets from history data
-        dataset1 = None
-        dataset2 = None
-        for item in self.history_data:
-            if item['id'] == dataset1_id:
-                dataset1 = item
-            if item['id'] == dataset2_id:
-                dataset2 = item
-        
-        if not dataset1 or not dataset2:
-            QMessageBox.warning(self, 'Error', 'Selected datasets not found in history')
-            return
-        
-        # Use the summary data from history
-        self.dataset1_summary = {
-            'avg_flowrate': dataset1['avg_flowrate'],
-            'avg_pressure': dataset1['avg_pressure'],
-            'avg_temperature': dataset1['avg_temperature'],
-            'total_count': dataset1['total_count'],
-            'equipment_type_distribution': dataset1.get('equipment_type_distribution', {})
-        }
-        
-        self.dataset2_summary = {
-            'avg_flowrate': dataset2['avg_flowrate'],
-            'avg_pressure': dataset2['avg_pressure'],
-            'avg_temperature': dataset2['avg_temperature'],
-            'total_count': dataset2['total_count'],
-            'equipment_type_distribution': dataset2.get('equipment_type_distribution', {})
-        }
-        
-        # Set dummy data for charts (since we can't get detailed data)
-        self.dataset1_data = []
-        self.dataset2_data = []
+        # The server diffs both datasets so neither has to be downloaded row by row
+        self.api.get(
+            'compare', f'compare/{dataset1_id}/{dataset2_id}/', self.on_comparison_loaded,
+            lambda error: QMessageBox.warning(self, 'Error', f'Failed to compare datasets: {str(error)}'),
+            cached=True,
+        )
+    
+    def on_comparison_loaded(self, comparison):
+        self.dataset1_summary = comparison['dataset1']
+        self.dataset2_summary = comparison['dataset2']
+        self.equipment_comparison = comparison['equipment']
         
         self.display_comparison()
     
@@ -217,6 +188,24 @@ class ComparisonWidget(QWidget):
         metrics_group.setLayout(metrics_layout)
         self.results_layout.addWidget(metrics_group)
         
+        # Equipment matched by name across both datasets
+        matched_group = QGroupBox('Matched Equipment')
+        matched_layout = QVBoxLayout()
+        equipment = self.equipment_comparison
+        counts_label = QLabel(
+            f"Matched: {equipment['matched']}    Changed: {equipment['changed']}    "
+            f"Only in Dataset 1: {equipment['only_in_dataset1']}    "
+            f"Only in Dataset 2: {equipment['only_in_dataset2']}"
+        )
+        matched_layout.addWidget(counts_label)
+        for row in equipment['largest_changes'][:5]:
+            matched_layout.addWidget(QLabel(
+                f"{row['equipment_name']}: flowrate {row['flowrate_delta']:+.2f}, "
+                f"pressure {row['pressure_delta']:+.2f}, temperature {row['temperature_delta']:+.2f}"
+            ))
+        matched_group.setLayout(matched_layout)
+        self.results_layout.addWidget(matched_group)
+        
         # Charts
         charts_group = QGroupBox('Visual Comparison')
         charts_layout = QVBoxLayout()
@@ -0,0 +1,45 @@
+from io import BytesIO
+
+import numpy as np
+
+
+NUMERIC_COLUMNS = ('flowrate', 'pressure', 'temperature')
+
+
+class EquipmentColumns:
+    """Equipment rows held as NumPy column arrays, decoded from the /data/ ?format=npz response"""
+
+    def __init__(self, arrays):
+        self.ids = arrays['id']
+        self.numeric = {name: arrays[name] for name in NUMERIC_COLUMNS}
+        self.name_values = arrays['equipment_name_values']
+        self.name_codes = arrays['equipment_name_codes']
+        self.type_values = arrays['equipment_type_values']
+        self.type_codes = arrays['equipment_type_codes']
+
+    @classmethod
+    def from_npz(cls, content):
+        with np.load(BytesIO(content), allow_pickle=False) as archive:
+            return cls({name: archive[name] for name in archive.files})
+
+    def __len__(self):
+        return len(self.ids)
+
+    def names(self, indices=None):
+        codes = self.name_codes if indices is None else self.name_codes[indices]
+        return self.name_values[codes]
+
+    def types(self, indices=None):
+        codes = self.type_codes if indices is None else self.type_codes[indices]
+        return self.type_values[codes]
+
+    def top_indices(self, column, k=10):
+        """Indices of the k largest values, largest first, selected in linear time"""
+        values = self.numeric[column]
+        if len(values) > k:
+            kth = values[np.argpartition(values, len(values) - k)[len(values) - k]]
+            # Every row tied with the k-th value competes, so ties go to the earliest rows
+            candidates = np.flatnonzero(values >= kth)
+        else:
+            candidates = np.arange(len(values))
+        return candidates[np.lexsort((candidates, -values[candidates]))][:k]
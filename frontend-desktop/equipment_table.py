@@ -0,0 +1,136 @@
+import numpy as np
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+HEADERS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+NUMERIC_KEYS = [None, None, 'flowrate', 'pressure', 'temperature']
+
+# Rows handed to the view per fetchMore call
+FETCH_ROWS = 1000
+
+
+class EquipmentTableModel(QAbstractTableModel):
+    """Table model reading cells straight from EquipmentColumns arrays.
+
+    Nothing is materialised per row: data() formats a cell when the view asks for it.
+    Sorting and filtering keep an index array into the columns, built with NumPy rather
+    than a QSortFilterProxyModel whose per-row Python callbacks would crawl over a
+    million rows. Each column is argsorted once per dataset, and a filter only masks
+    that permutation. The view is handed rows in FETCH_ROWS batches as it scrolls.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.columns = None
+        self.filtered = np.arange(0)
+        self.order = self.filtered
+        self.loaded = 0
+        self.sort_column = -1
+        self.sort_order = Qt.AscendingOrder
+        self.filter_text = ''
+        self._permutations = {}
+        self._lower_names = None
+
+    def set_columns(self, columns):
+        self.beginResetModel()
+        self.columns = columns
+        self._permutations = {}
+        self._lower_names = None
+        self._apply()
+        self.endResetModel()
+
+    def set_filter(self, text):
+        self.beginResetModel()
+        self.filter_text = text.strip().lower()
+        self._apply()
+        self.endResetModel()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if (column, order) == (self.sort_column, self.sort_order):
+            return
+        self.beginResetModel()
+        self.sort_column = column
+        self.sort_order = order
+        self._apply()
+        self.endResetModel()
+
+    def total_rows(self):
+        return 0 if self.columns is None else len(self.columns)
+
+    def matching_rows(self):
+        return len(self.order)
+
+    def _apply(self):
+        self.filtered = self._filter()
+        self.order = self._sort(self.filtered)
+        self.loaded = min(FETCH_ROWS, len(self.order))
+
+    def _filter(self):
+        columns = self.columns
+        if columns is None:
+            return np.arange(0)
+        if not self.filter_text:
+            return np.arange(len(columns))
+        # Match against the unique names and types, then map the matches onto rows by code
+        if self._lower_names is None:
+            self._lower_names = np.char.lower(columns.name_values)
+        names = np.char.find(self._lower_names, self.filter_text) >= 0
+        types = np.char.find(np.char.lower(columns.type_values), self.filter_text) >= 0
+        return np.flatnonzero(names[columns.name_codes] | types[columns.type_codes])
+
+    def _sort(self, rows):
+        if self.sort_column < 0 or self.columns is None:
+            return rows
+        order = self._permutations.get(self.sort_column)
+        if order is None:
+            order = self._permutations[self.sort_column] = np.argsort(self._sort_key(self.sort_column), kind='stable')
+        if len(rows) < len(order):
+            keep = np.zeros(len(order), dtype=bool)
+            keep[rows] = True
+            order = order[keep[order]]
+        return order[::-1] if self.sort_order == Qt.DescendingOrder else order
+
+    def _sort_key(self, column):
+        # np.unique sorts the dictionary values, so codes order rows like their strings
+        if column == 0:
+            return self.columns.name_codes
+        if column == 1:
+            return self.columns.type_codes
+        return self.columns.numeric[NUMERIC_KEYS[column]]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < len(self.order)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(FETCH_ROWS, len(self.order) - self.loaded)
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter) if column >= 2 else None
+        if role != Qt.DisplayRole:
+            return None
+        row = self.order[index.row()]
+        if column == 0:
+            return str(self.columns.name_values[self.columns.name_codes[row]])
+        if column == 1:
+            return str(self.columns.type_values[self.columns.type_codes[row]])
+        return f'{self.columns.numeric[NUMERIC_KEYS[column]][row]:.2f}'
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return section + 1
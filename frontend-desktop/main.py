@@ -1,7 +1,10 @@
+import json
+import os
 import sys
-import base64
-import requests
+import time
 from datetime import datetime
+
+import requests
 from PyQt5.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -13,6 +16,8 @@ from PyQt5.QtWidgets import (
     QFileDialog,
     QTableWidget,
     QTableWidgetItem,
+    QTableView,
+    QHeaderView,
     QMessageBox,
     QDialog,
     QLineEdit,
@@ -25,14 +30,34 @@ from PyQt5.QtWidgets import (
     QScrollArea,
     QFrame,
     QSplitter,
+    QProgressBar,
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QStandardPaths, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
+from api_client import REQUEST_TIMEOUT, ApiClient, ApiError
 from comparison_widget import ComparisonWidget
-
-API_BASE_URL = 'http://localhost:8000/api'
+from equipment_columns import EquipmentColumns
+from equipment_table import EquipmentTableModel
+from response_cache import ResponseCache
+
+REPORT_POLL_INTERVAL_MS = 500
+TABLE_FILTER_DELAY_MS = 250
+# Give up following an upload that hasn't changed for this long, longer than the server
+# takes to fail a job whose worker died
+UPLOAD_STALL_SECONDS = 15 * 60
+# Reconnection attempts, and seconds between them, while the server can't be reached
+UPLOAD_FOLLOW_RETRIES = 5
+UPLOAD_RETRY_DELAY = 2
+
+UPLOAD_STAGE_LABELS = {
+    'hash': 'Checking for duplicates',
+    'parse': 'Parsing',
+    'aggregate': 'Aggregating',
+    'insert': 'Inserting rows',
+    'prune': 'Applying retention',
+}
 
 LIGHT_BLUE_THEME = """
     QMainWindow, QWidget {
@@ -79,7 +104,7 @@ LIGHT_BLUE_THEME = """
         font-weight: bold;
     }
 
-    QTableWidget {
+    QTableWidget, QTableView {
         background-color: #FFFFFF;
         color: #1A1E29;
         gridline-color: #D1D5DB;
@@ -130,28 +155,82 @@ class LoginDialog(QDialog):
         return self.username_input.text(), self.password_input.text()
 
 
-class DataLoaderThread(QThread):
+class UploadJobThread(QThread):
+    """Submit an upload job and follow its Server-Sent Events progress stream"""
 
-    data_loaded = pyqtSignal(dict)
+    progress = pyqtSignal(dict)
+    finished_job = pyqtSignal(dict)
     error_occurred = pyqtSignal(str)
 
-    def __init__(self, url, auth_header):
+    def __init__(self, file_path, api):
         super().__init__()
-        self.url = url
-        self.auth_header = auth_header
+        self.file_path = file_path
+        self.api = api
 
     def run(self):
         try:
-            response = requests.get(self.url, headers=self.auth_header)
-            if response.status_code == 200:
-                self.data_loaded.emit(response.json())
-            else:
-                self.error_occurred.emit(f"Error {response.status_code}: {response.text}")
+            with open(self.file_path, 'rb') as f:
+                response = self.api.session.post(
+                    self.api.url('uploads/'), files={'file': f}, timeout=REQUEST_TIMEOUT
+                )
+            if response.status_code != 202:
+                self.error_occurred.emit(response.json().get('error', 'Upload failed'))
+                return
+            job = response.json()
+            self.progress.emit(job)
+            # The server closes long streams; reconnect until the job finishes, but give up
+            # when the server stays unreachable or the job stops changing
+            changed = time.monotonic()
+            failures = 0
+            while job['status'] in ('pending', 'running'):
+                if time.monotonic() - changed > UPLOAD_STALL_SECONDS:
+                    raise RuntimeError('the upload stopped making progress')
+                try:
+                    latest = self.follow(job)
+                except requests.ConnectionError:
+                    failures += 1
+                    if failures > UPLOAD_FOLLOW_RETRIES:
+                        raise
+                    time.sleep(UPLOAD_RETRY_DELAY)
+                    continue
+                failures = 0
+                if latest != job:
+                    changed = time.monotonic()
+                job = latest
+            self.finished_job.emit(job)
         except Exception as e:
-            self.error_occurred.emit(f"Connection error: {str(e)}")
+            self.error_occurred.emit(f'Failed to upload file: {str(e)}')
+
+    def follow(self, job):
+        with self.api.session.get(
+            self.api.url(f"uploads/{job['id']}/events/"),
+            headers={'Accept': 'text/event-stream'},
+            stream=True,
+            timeout=REQUEST_TIMEOUT,
+        ) as response:
+            response.raise_for_status()
+            response.encoding = 'utf-8'
+            event = None
+            # chunk_size=None hands over each event as soon as it arrives
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                if line.startswith('event: '):
+                    event = line[len('event: '):]
+                elif line.startswith('data: '):
+                    data = json.loads(line[len('data: '):])
+                    if event == 'error':
+                        raise RuntimeError(data.get('error', 'Upload failed'))
+                    job = data
+                    if event == 'progress':
+                        self.progress.emit(job)
+        return job
 
 
 class ChartWidget(QWidget):
+    """Matplotlib chart that keeps its axes and artists between updates.
+
+    New data is written into the existing bars or line, and drawing waits until the
+    widget is shown, so refreshing charts on hidden tabs costs nothing.
+    """
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -160,51 +239,86 @@ class ChartWidget(QWidget):
         layout = QVBoxLayout()
         layout.addWidget(self.canvas)
         self.setLayout(layout)
+        self.ax = None
+        self.bars = None
+        self.line = None
+        self.fill = None
+        self.stale = False
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.stale:
+            self.refresh()
+
+    def refresh(self):
+        self.stale = not self.isVisible()
+        if not self.stale:
+            self.canvas.draw_idle()
+
+    def create_axes(self, title, ylabel):
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_title(title, fontsize=14, fontweight='bold', color='#1A1E29')
+        self.ax.set_ylabel(ylabel, color='#1A1E29')
+        self.ax.tick_params(axis='x', rotation=45, colors='#1A1E29')
+        self.ax.grid(True, alpha=0.3, color='#D1D5DB')
+        self.ax.spines['top'].set_visible(False)
+        self.ax.spines['right'].set_visible(False)
+        # Fixed margins leave room for the rotated names without a tight_layout pass per update
+        self.figure.subplots_adjust(left=0.1, right=0.97, top=0.9, bottom=0.32)
+
+    def set_categories(self, labels, values):
+        self.ax.set_xticks(range(len(labels)))
+        self.ax.set_xticklabels(labels, ha='right')
+        self.ax.set_xlim(-0.6, max(len(labels), 1) - 0.4)
+        top = max(values, default=0)
+        self.ax.set_ylim(0, top * 1.1 if top > 0 else 1)
 
     def plot_pie(self, labels, values, title):
+        # Wedge count follows the types present, so the pie is rebuilt; it only changes with the dataset
         self.figure.clear()
         ax = self.figure.add_subplot(111)
         colors = ['#2E6BF0', '#2563eb', '#3b82f6', '#60a5fa', '#93c5fd', '#bfdbfe', '#dbeafe', '#eff6ff', '#f0f9ff']
         ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors[:len(labels)])
         ax.set_title(title, fontsize=14, fontweight='bold', color='#1A1E29')
-        self.canvas.draw()
-
-    def plot_bar(self, labels, values, title, ylabel):
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        ax.bar(labels, values, color='#2E6BF0', edgecolor='#1d4ed8', alpha=0.8)
-        ax.set_title(title, fontsize=14, fontweight='bold', color='#1A1E29')
-        ax.set_ylabel(ylabel, color='#1A1E29')
-        ax.tick_params(axis='x', rotation=45, colors='#1A1E29')
-        ax.grid(True, alpha=0.3, color='#D1D5DB')
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        self.figure.tight_layout()
-        self.canvas.draw()
+        self.refresh()
+
+    def plot_bar(self, labels, values, title, ylabel, size=10):
+        if self.bars is None:
+            self.create_axes(title, ylabel)
+            self.bars = self.ax.bar(range(size), [0] * size, color='#2E6BF0', edgecolor='#1d4ed8', alpha=0.8)
+        for i, bar in enumerate(self.bars):
+            bar.set_visible(i < len(values))
+            bar.set_height(values[i] if i < len(values) else 0)
+        self.set_categories(labels, values)
+        self.refresh()
 
     def plot_line(self, labels, values, title, ylabel, color='#2E6BF0'):
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        ax.plot(labels, values, marker='o', color=color, linewidth=2, markersize=6, markerfacecolor='white', markeredgewidth=2)
-        ax.set_title(title, fontsize=14, fontweight='bold', color='#1A1E29')
-        ax.set_ylabel(ylabel, color='#1A1E29')
-        ax.grid(True, alpha=0.3, color='#D1D5DB')
-        ax.tick_params(axis='x', rotation=45, colors='#1A1E29')
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.fill_between(labels, values, alpha=0.1, color=color)
-        self.figure.tight_layout()
-        self.canvas.draw()
+        if self.line is None:
+            self.create_axes(title, ylabel)
+            (self.line,) = self.ax.plot(
+                [], [], marker='o', color=color, linewidth=2, markersize=6, markerfacecolor='white', markeredgewidth=2
+            )
+        positions = range(len(values))
+        self.line.set_data(positions, values)
+        if self.fill is not None:
+            self.fill.remove()
+        self.fill = self.ax.fill_between(positions, values, alpha=0.1, color=color)
+        self.set_categories(labels, values)
+        self.refresh()
 
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.username = None
-        self.password = None
-        self.auth_header = None
-        self.current_data = []
+        self.current_dataset_id = None
+        self.current_columns = None
         self.current_summary = None
+        self.history_data = []
+        cache_dir = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.response_cache = ResponseCache(os.path.join(cache_dir, 'responses.sqlite3'))
+        self.api = ApiClient(cache=self.response_cache, parent=self)
         self.init_ui()
         self.show_login()
 
@@ -231,6 +345,12 @@ class MainWindow(QMainWindow):
         self.upload_btn = QPushButton('Select CSV File')
         self.upload_btn.clicked.connect(self.upload_file)
         upload_layout.addWidget(self.upload_btn)
+        self.upload_progress = QProgressBar()
+        self.upload_progress.setRange(0, 100)
+        self.upload_progress.setVisible(False)
+        upload_layout.addWidget(self.upload_progress)
+        self.upload_status = QLabel('')
+        upload_layout.addWidget(self.upload_status)
         upload_layout.addStretch()
         self.logout_btn = QPushButton('Logout')
         self.logout_btn.clicked.connect(self.logout)
@@ -262,38 +382,38 @@ class MainWindow(QMainWindow):
 
         table_group = QGroupBox('Equipment Data')
         table_layout = QVBoxLayout()
-        self.data_table = QTableWidget()
-        self.data_table.setColumnCount(5)
-        self.data_table.setHorizontalHeaderLabels([
-            'Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature'
-        ])
-        self.data_table.horizontalHeader().setStretchLastSection(True)
+        filter_layout = QHBoxLayout()
+        self.table_filter = QLineEdit()
+        self.table_filter.setPlaceholderText('Filter by name or type')
+        self.table_filter.setClearButtonEnabled(True)
+        # Refilter once typing pauses rather than on every keystroke
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(TABLE_FILTER_DELAY_MS)
+        self.filter_timer.timeout.connect(self.filter_table)
+        self.table_filter.textChanged.connect(self.filter_timer.start)
+        filter_layout.addWidget(self.table_filter)
+        self.row_label = QLabel('0 rows')
+        filter_layout.addWidget(self.row_label)
+        table_layout.addLayout(filter_layout)
+
+        self.table_model = EquipmentTableModel(self)
+        self.data_table = QTableView()
+        self.data_table.setModel(self.table_model)
         self.data_table.setAlternatingRowColors(True)
-        self.data_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.data_table.setSelectionBehavior(QTableView.SelectRows)
+        self.data_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        header = self.data_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        header.setSectionResizeMode(1, QHeaderView.Interactive)
+        for column in (2, 3, 4):
+            header.setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        # No sort indicator until a header is clicked, so rows start in upload order
+        header.setSortIndicator(-1, Qt.AscendingOrder)
         self.data_table.setSortingEnabled(True)
-        self.data_table.setMaximumHeight(120)
-        self.data_table.setFixedHeight(120)
+        self.data_table.setMinimumHeight(240)
         table_layout.addWidget(self.data_table)
-        
-        nav_layout = QHBoxLayout()
-        self.prev_btn = QPushButton('← Previous')
-        self.next_btn = QPushButton('Next →')
-        self.prev_btn.clicked.connect(self.show_previous_rows)
-        self.next_btn.clicked.connect(self.show_next_rows)
-        self.prev_btn.setEnabled(False)
-        self.next_btn.setEnabled(False)
-        
-        self.row_label = QLabel('Showing 0-0 of 0')
-        self.row_label.setAlignment(Qt.AlignCenter)
-        
-        nav_layout.addWidget(self.prev_btn)
-        nav_layout.addWidget(self.row_label)
-        nav_layout.addWidget(self.next_btn)
-        table_layout.addLayout(nav_layout)
-        
-        self.current_row_start = 0
-        self.rows_per_page = 3
-        
+
         table_group.setLayout(table_layout)
         self.main_layout.addWidget(table_group)
 
@@ -301,6 +421,10 @@ class MainWindow(QMainWindow):
         pdf_layout.addStretch()
         self.pdf_btn = QPushButton('Generate PDF Report')
         self.pdf_btn.clicked.connect(self.generate_pdf)
+        self.report_job = None
+        self.report_timer = QTimer(self)
+        self.report_timer.setSingleShot(True)
+        self.report_timer.timeout.connect(self.check_report_job)
         pdf_layout.addWidget(self.pdf_btn)
         pdf_layout.addStretch()
         self.main_layout.addLayout(pdf_layout)
@@ -328,81 +452,108 @@ class MainWindow(QMainWindow):
         self.history_tab.setLayout(history_layout)
         self.tabs.addTab(self.history_tab, 'History')
 
-        self.comparison_widget = ComparisonWidget()
-        self.comparison_widget.set_auth_header(self.auth_header)
+        self.comparison_widget = ComparisonWidget(self.api)
         self.tabs.addTab(self.comparison_widget, 'Compare Datasets')
 
     def show_login(self):
         login_dialog = LoginDialog(self)
         if login_dialog.exec_() == QDialog.Accepted:
             username, password = login_dialog.get_credentials()
-            if self.authenticate(username, password):
-                self.username = username
-                self.password = password
-                self.auth_header = {
-                    'Authorization': f'Basic {self.encode_auth(username, password)}'
-                }
-                self.load_initial_data()
-            else:
-                QMessageBox.warning(self, 'Login Failed', 'Invalid credentials. Please try again.')
-                self.show_login()
+            self.authenticate(username, password)
         else:
             sys.exit()
 
-    def encode_auth(self, username, password):
-        return base64.b64encode(f'{username}:{password}'.encode()).decode()
-
     def authenticate(self, username, password):
-        try:
-            auth_header = {
-                'Authorization': f'Basic {self.encode_auth(username, password)}'
-            }
-            response = requests.get(f'{API_BASE_URL}/history/', headers=auth_header)
-            return response.status_code == 200
-        except Exception as e:
-            print(f"Authentication error: {e}")
-            return False
+        self.api.post(
+            'login', 'login/',
+            lambda body: self.on_authenticated(username, body['token']),
+            self.on_authentication_failed,
+            data={'username': username, 'password': password},
+        )
+
+    def on_authenticated(self, username, token):
+        self.username = username
+        self.api.set_token(token)
+        self.load_initial_data()
+
+    def on_authentication_failed(self, error):
+        if isinstance(error, ApiError):
+            QMessageBox.warning(self, 'Login Failed', 'Invalid credentials. Please try again.')
+        else:
+            QMessageBox.warning(self, 'Login Failed', f'Could not reach the server: {str(error)}')
+        self.show_login()
 
     def logout(self):
+        self.api.cancel_all()
+        self.report_timer.stop()
+        self.reset_pdf_button()
         self.username = None
-        self.password = None
-        self.auth_header = None
-        self.current_data = []
+        self.api.set_token(None)
+        self.current_dataset_id = None
+        self.current_columns = None
         self.current_summary = None
         self.clear_ui()
         self.show_login()
 
+    def closeEvent(self, event):
+        self.api.shutdown()
+        self.response_cache.close()
+        super().closeEvent(event)
+
     def clear_ui(self):
         while self.summary_layout.count():
             child = self.summary_layout.takeAt(0)
             if child.widget():
                 child.widget().deleteLater()
-        self.data_table.setRowCount(0)
+        self.table_model.set_columns(None)
+        self.update_row_label()
         self.history_table.setRowCount(0)
 
     def load_initial_data(self):
-        self.load_summary()
-        self.load_data()
+        # Summary, data and history are fetched concurrently; each view updates as its response arrives
+        self.load_dataset()
         self.load_history()
 
+    def load_dataset(self):
+        self.current_summary = None
+        self.current_columns = None
+        self.load_summary()
+        self.load_columns()
+
+    def dataset_url(self, endpoint):
+        if self.current_dataset_id:
+            return f'{endpoint}/{self.current_dataset_id}/'
+        return f'{endpoint}/'
+
+    def load_failed(self, what):
+        """Error callback warning about connection failures; error statuses, such as no dataset yet, are ignored"""
+        def on_error(error):
+            if not isinstance(error, ApiError):
+                QMessageBox.warning(self, 'Error', f'Failed to load {what}: {str(error)}')
+        return on_error
+
     def load_summary(self):
-        try:
-            response = requests.get(f'{API_BASE_URL}/summary/', headers=self.auth_header)
-            if response.status_code == 200:
-                self.current_summary = response.json()
-                self.update_summary_display()
-        except Exception as e:
-            QMessageBox.warning(self, 'Error', f'Failed to load summary: {str(e)}')
+        self.api.get(
+            'summary', self.dataset_url('summary'), self.on_summary_loaded, self.load_failed('summary'), cached=True
+        )
 
-    def load_data(self):
-        try:
-            response = requests.get(f'{API_BASE_URL}/data/', headers=self.auth_header)
-            if response.status_code == 200:
-                self.current_data = response.json()
-                self.update_data_table()
-                self.update_charts()
-        except Exception as e:
-            QMessageBox.warning(self, 'Error', f'Failed to load data: {str(e)}')
+    def on_summary_loaded(self, summary):
+        self.current_summary = summary
+        self.update_summary_display()
+        self.update_type_chart()
+
+    def load_columns(self):
+        self.api.get(
+            'columns', self.dataset_url('data'), self.on_columns_loaded, self.load_failed('chart data'),
+            cached=True, decode=EquipmentColumns.from_npz,
+            params={'format': 'npz'},
+        )
+
+    def on_columns_loaded(self, columns):
+        self.current_columns = columns
+        self.table_model.set_columns(columns)
+        self.update_row_label()
+        self.update_top_charts()
 
     def update_summary_display(self):
         while self.summary_layout.count():
@@ -427,69 +578,51 @@ class MainWindow(QMainWindow):
             self.summary_layout.addWidget(label_widget, i // 2, (i % 2) * 2)
             self.summary_layout.addWidget(value_widget, i // 2, (i % 2) * 2 + 1)
 
-    def update_data_table(self):
-        if not self.current_data:
-            return
-            
-        total_rows = len(self.current_data)
-        end_row = min(self.current_row_start + self.rows_per_page, total_rows)
-        
-        self.data_table.setRowCount(end_row - self.current_row_start)
-        
-        for i, row_idx in enumerate(range(self.current_row_start, end_row)):
-            item = self.current_data[row_idx]
-            self.data_table.setItem(i, 0, QTableWidgetItem(item['equipment_name']))
-            self.data_table.setItem(i, 1, QTableWidgetItem(item['equipment_type']))
-            self.data_table.setItem(i, 2, QTableWidgetItem(f"{item['flowrate']:.2f}"))
-            self.data_table.setItem(i, 3, QTableWidgetItem(f"{item['pressure']:.2f}"))
-            self.data_table.setItem(i, 4, QTableWidgetItem(f"{item['temperature']:.2f}"))
-        
-        self.prev_btn.setEnabled(self.current_row_start > 0)
-        self.next_btn.setEnabled(end_row < total_rows)
-        self.row_label.setText(f"Showing {self.current_row_start + 1}-{end_row} of {total_rows}")
-        
-        header = self.data_table.horizontalHeader()
-        header.setSectionResizeMode(0, 1)
-        header.setSectionResizeMode(1, 2) 
-        header.setSectionResizeMode(2, 3)
-        header.setSectionResizeMode(3, 3)
-        header.setSectionResizeMode(4, 3)
-
-    def show_previous_rows(self):
-        if self.current_row_start > 0:
-            self.current_row_start = max(0, self.current_row_start - self.rows_per_page)
-            self.update_data_table()
-
-    def show_next_rows(self):
-        total_rows = len(self.current_data)
-        if self.current_row_start + self.rows_per_page < total_rows:
-            self.current_row_start += self.rows_per_page
-            self.update_data_table()
-
-    def update_charts(self):
-        if not self.current_data or not self.current_summary:
+    def filter_table(self):
+        self.table_model.set_filter(self.table_filter.text())
+        self.update_row_label()
+
+    def update_row_label(self):
+        total = self.table_model.total_rows()
+        matching = self.table_model.matching_rows()
+        if matching == total:
+            self.row_label.setText(f'{total:,} rows')
+        else:
+            self.row_label.setText(f'{matching:,} of {total:,} rows')
+
+    def update_type_chart(self):
+        if not self.current_summary:
             return
         type_dist = self.current_summary['equipment_type_distribution']
         types = list(type_dist.keys())
         counts = list(type_dist.values())
         self.pie_chart.plot_pie(types, counts, 'Equipment Type Distribution')
 
-        flowrate_data = sorted(self.current_data, key=lambda x: x['flowrate'], reverse=True)[:10]
-        flowrate_labels = [item['equipment_name'] for item in flowrate_data]
-        flowrate_values = [item['flowrate'] for item in flowrate_data]
-        self.flowrate_chart.plot_bar(flowrate_labels, flowrate_values, 'Flowrate by Equipment (Top 10)', 'Flowrate')
+    def update_top_charts(self):
+        columns = self.current_columns
+        if columns is None:
+            return
 
-        pressure_data = sorted(self.current_data, key=lambda x: x['pressure'], reverse=True)[:10]
-        pressure_labels = [item['equipment_name'] for item in pressure_data]
-        pressure_values = [item['pressure'] for item in pressure_data]
-        self.pressure_chart.plot_line(pressure_labels, pressure_values, 'Pressure by Equipment (Top 10)', 'Pressure', '#60a5fa')
+        top = columns.top_indices('flowrate')
+        self.flowrate_chart.plot_bar(
+            list(columns.names(top)), columns.numeric['flowrate'][top],
+            'Flowrate by Equipment (Top 10)', 'Flowrate'
+        )
 
-        temp_data = sorted(self.current_data, key=lambda x: x['temperature'], reverse=True)[:10]
-        temp_labels = [item['equipment_name'] for item in temp_data]
-        temp_values = [item['temperature'] for item in temp_data]
-        self.temperature_chart.plot_line(temp_labels, temp_values, 'Temperature by Equipment (Top 10)', 'Temperature', '#93c5fd')
+        top = columns.top_indices('pressure')
+        self.pressure_chart.plot_line(
+            list(columns.names(top)), columns.numeric['pressure'][top],
+            'Pressure by Equipment (Top 10)', 'Pressure', '#60a5fa'
+        )
+
+        top = columns.top_indices('temperature')
+        self.temperature_chart.plot_line(
+            list(columns.names(top)), columns.numeric['temperature'][top],
+            'Temperature by Equipment (Top 10)', 'Temperature', '#93c5fd'
+        )
 
     def update_history_table(self, history_data):
+        self.history_data = history_data
         self.history_table.setRowCount(len(history_data))
         for row, item in enumerate(history_data):
             uploaded_at = datetime.fromisoformat(item['uploaded_at'].replace('Z', '+00:00'))
@@ -502,20 +635,15 @@ class MainWindow(QMainWindow):
         self.history_table.resizeColumnsToContents()
 
     def load_history(self):
-        try:
-            response = requests.get(f'{API_BASE_URL}/history/', headers=self.auth_header)
-            if response.status_code == 200:
-                history_data = response.json()
-                self.update_history_table(history_data)
+        self.api.get('history', 'history/', self.on_history_loaded, self.load_failed('history'), cached=True)
 
-                if hasattr(self, 'comparison_widget'):
-                    self.comparison_widget.load_history(history_data)
-        except Exception as e:
-            QMessageBox.warning(self, 'Error', f'Failed to load history: {str(e)}')
+    def on_history_loaded(self, history_data):
+        self.update_history_table(history_data)
+        self.comparison_widget.load_history(history_data)
 
     def on_history_item_double_clicked(self, index):
-        self.load_summary()
-        self.load_data()
+        self.current_dataset_id = self.history_data[index.row()]['id']
+        self.load_dataset()
 
     def upload_file(self):
         file_path, _ = QFileDialog.getOpenFileName(
@@ -523,40 +651,101 @@ class MainWindow(QMainWindow):
         )
         if not file_path:
             return
-        try:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                response = requests.post(
-                    f'{API_BASE_URL}/upload/', files=files, headers=self.auth_header
-                )
-            if response.status_code == 201:
-                QMessageBox.information(self, 'Success', 'File uploaded successfully!')
-                self.load_initial_data()
-            else:
-                error_msg = response.json().get('error', 'Upload failed')
-                QMessageBox.warning(self, 'Upload Failed', error_msg)
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', f'Failed to upload file: {str(e)}')
+        self.upload_btn.setEnabled(False)
+        self.upload_progress.setValue(0)
+        self.upload_progress.setVisible(True)
+        self.upload_status.setText('Uploading...')
+        self.upload_thread = UploadJobThread(file_path, self.api)
+        self.upload_thread.progress.connect(self.on_upload_progress)
+        self.upload_thread.finished_job.connect(self.on_upload_finished)
+        self.upload_thread.error_occurred.connect(self.on_upload_error)
+        self.upload_thread.start()
+
+    def on_upload_progress(self, job):
+        if job['bytes_total']:
+            self.upload_progress.setValue(int(100 * job['bytes_parsed'] / job['bytes_total']))
+        stage = UPLOAD_STAGE_LABELS.get(job['stage'], 'Queued')
+        self.upload_status.setText(f"{stage}: {job['rows_inserted']:,} rows inserted")
+
+    def reset_upload(self):
+        self.upload_btn.setEnabled(True)
+        self.upload_progress.setVisible(False)
+        self.upload_status.setText('')
+
+    def on_upload_finished(self, job):
+        self.reset_upload()
+        if job['status'] != 'done':
+            QMessageBox.warning(self, 'Upload Failed', job.get('error') or 'Upload failed')
+            return
+        result = job['result']
+        if result.get('duplicate'):
+            QMessageBox.information(
+                self, 'Already Uploaded', 'This file was uploaded before; showing the existing dataset.'
+            )
+        else:
+            QMessageBox.information(self, 'Success', 'File uploaded successfully!')
+        self.current_dataset_id = result['id']
+        self.load_initial_data()
+
+    def on_upload_error(self, message):
+        self.reset_upload()
+        QMessageBox.critical(self, 'Error', message)
 
     def generate_pdf(self):
-        try:
-            response = requests.get(f'{API_BASE_URL}/pdf/', headers=self.auth_header, stream=True)
-            if response.status_code == 200:
-                file_path, _ = QFileDialog.getSaveFileName(
-                    self, 'Save PDF Report', 'equipment_report.pdf', 'PDF Files (*.pdf)'
-                )
-                if file_path:
-                    with open(file_path, 'wb') as f:
-                        f.write(response.content)
-                    QMessageBox.information(self, 'Success', f'PDF saved to {file_path}')
-            else:
-                QMessageBox.warning(self, 'Error', 'Failed to generate PDF')
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', f'Failed to generate PDF: {str(e)}')
+        self.pdf_btn.setEnabled(False)
+        self.pdf_btn.setText('Generating PDF...')
+        self.api.post(
+            'report', 'reports/', self.on_report_job, self.on_report_failed,
+            json={'dataset_id': self.current_dataset_id},
+        )
+
+    def check_report_job(self):
+        self.api.get('report', f"reports/{self.report_job['id']}/", self.on_report_job, self.on_report_failed)
+
+    def on_report_job(self, job):
+        self.report_job = job
+        if job['status'] in ('pending', 'running'):
+            self.report_timer.start(REPORT_POLL_INTERVAL_MS)
+            return
+        self.reset_pdf_button()
+        if job['status'] == 'done':
+            self.save_report()
+        else:
+            QMessageBox.warning(self, 'Error', f"Failed to generate PDF: {job['error']}")
+
+    def on_report_failed(self, error):
+        self.reset_pdf_button()
+        QMessageBox.critical(self, 'Error', f'Failed to generate PDF: {str(error)}')
 
+    def reset_pdf_button(self):
+        self.pdf_btn.setEnabled(True)
+        self.pdf_btn.setText('Generate PDF Report')
+
+    def save_report(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, 'Save PDF Report', 'equipment_report.pdf', 'PDF Files (*.pdf)'
+        )
+        if not file_path:
+            return
+
+        def write_file(response):
+            if response.status_code != 200:
+                raise ApiError(response.status_code, 'Failed to download PDF')
+            with open(file_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    f.write(chunk)
+            return file_path
+
+        self.api.get(
+            'report_file', f"reports/{self.report_job['id']}/file/",
+            lambda path: QMessageBox.information(self, 'Success', f'PDF saved to {path}'),
+            lambda error: QMessageBox.critical(self, 'Error', f'Failed to download PDF: {str(error)}'),
+            handler=write_file, stream=True,
+        )
 
 def main():
     app = QApplication(sys.argv)
+    app.setApplicationName('ChemicalEquipmentVisualizer')
     window = MainWindow()
     window.show()
     sys.exit(app.exec_())
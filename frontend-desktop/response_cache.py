@@ -0,0 +1,61 @@
+import sqlite3
+import threading
+import time
+
+
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class ResponseCache:
+    """Size-bounded LRU of API response bodies in a SQLite file, keyed by request URL.
+
+    Entries keep the server's ETag so they can be revalidated with If-None-Match.
+    Datasets never change after upload, so revalidation almost always ends in a 304.
+    Shared by the request worker threads.
+    """
+
+    def __init__(self, path, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'url TEXT PRIMARY KEY, etag TEXT, body BLOB NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS responses_used ON responses (used)')
+
+    def get(self, url):
+        """Return (etag, body) for url, or None, marking the entry as recently used"""
+        with self._lock:
+            row = self._db.execute('SELECT etag, body FROM responses WHERE url = ?', (url,)).fetchone()
+            if row is not None:
+                self._db.execute('UPDATE responses SET used = ? WHERE url = ?', (time.time(), url))
+            return row
+
+    def put(self, url, etag, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses (url, etag, body, size, used) VALUES (?, ?, ?, ?, ?)',
+                (url, etag, body, len(body), time.time()),
+            )
+            self._evict()
+
+    def discard(self, url):
+        with self._lock:
+            self._db.execute('DELETE FROM responses WHERE url = ?', (url,))
+
+    def _evict(self):
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._db.execute('SELECT url, size FROM responses ORDER BY used').fetchall():
+            self._db.execute('DELETE FROM responses WHERE url = ?', (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -14,39 +14,49 @@ const API_BASE_URL = process.env.REACT_APP_API_BASE_URL ||
     ? 'http://localhost:8000/api' 
     : 'https://chemical-equipment-visualizer-vcel.onrender.com/api');
 
+const REPORT_POLL_INTERVAL_MS = 500;
+// Give up following an upload that hasn't changed for this long, longer than the server
+// takes to fail a job whose worker died
+const UPLOAD_STALL_MS = 15 * 60 * 1000;
+// Reconnection attempts, and the delay between them, while the server can't be reached
+const UPLOAD_FOLLOW_RETRIES = 5;
+const UPLOAD_RETRY_DELAY_MS = 2000;
+
 console.log('API_BASE_URL:', API_BASE_URL);
 console.log('Hostname:', window.location.hostname);
 
 const getStoredCredentials = () => {
   try {
-    const stored = localStorage.getItem('auth_credentials');
+    const stored = localStorage.getItem('auth_token');
     return stored ? JSON.parse(stored) : null;
   } catch {
     return null;
   }
 };
 
-const storeCredentials = (username, password) => {
-  localStorage.setItem('auth_credentials', JSON.stringify({ username, password }));
+const storeCredentials = (username, token) => {
+  localStorage.setItem('auth_token', JSON.stringify({ username, token }));
 };
 
-const clearCredentials = () => localStorage.removeItem('auth_credentials');
+const clearCredentials = () => localStorage.removeItem('auth_token');
 
 function AppContent() {
   const [isAuthenticated, setIsAuthenticated] = useState(false);
   const [username, setUsername] = useState('');
   const [password, setPassword] = useState('');
+  const [token, setToken] = useState('');
   const [equipmentData, setEquipmentData] = useState([]);
   const [summary, setSummary] = useState(null);
   const [history, setHistory] = useState([]);
   const [error, setError] = useState(null);
   const [loading, setLoading] = useState(false);
+  const [uploadProgress, setUploadProgress] = useState(null);
   const [activeView, setActiveView] = useState('dashboard');
   const navigate = useNavigate();
 
   const getAuthHeaders = () => {
     const headers = {
-      'Authorization': `Basic ${btoa(`${username}:${password}`)}`,
+      'Authorization': `Token ${token}`,
     };
     console.log('Auth headers for user:', username);
     return headers;
@@ -69,7 +79,7 @@ function AppContent() {
       console.error('Failed to load summary:', err);
       setSummary(null);
     }
-  }, [username, password]);
+  }, [token]);
 
   const loadData = useCallback(async () => {
     try {
@@ -88,7 +98,7 @@ function AppContent() {
       console.error('Failed to load data:', err);
       setEquipmentData([]);
     }
-  }, [username, password]);
+  }, [token]);
 
   const loadHistory = useCallback(async () => {
     try {
@@ -107,7 +117,7 @@ function AppContent() {
       console.error('Failed to load history:', err);
       setHistory([]);
     }
-  }, [username, password]);
+  }, [token]);
 
   const loadInitialData = useCallback(async () => {
     console.log('Loading initial data with user:', username);
@@ -120,51 +130,75 @@ function AppContent() {
     } catch (err) {
       setError('Failed to load data');
     }
-  }, [username, password, loadSummary, loadData, loadHistory]);
+  }, [username, loadSummary, loadData, loadHistory]);
 
 
-  const verifyAuth = useCallback(async (user, pass) => {
+  const verifyToken = useCallback(async (user, authToken) => {
     try {
       const res = await fetch(`${API_BASE_URL}/history/`, {
-        headers: { 'Authorization': `Basic ${btoa(`${user}:${pass}`)}` },
+        headers: { 'Authorization': `Token ${authToken}` },
       });
-      if (!res.ok) return false;
+      if (!res.ok) {
+        clearCredentials();
+        return false;
+      }
       setIsAuthenticated(true);
       setUsername(user);
-      setPassword(pass);
-      storeCredentials(user, pass);
-      loadInitialData();
+      setToken(authToken);
       return true;
     } catch {
       return false;
     }
-  }, [loadInitialData]);
-
+  }, []);
 
+  const requestToken = useCallback(async (user, pass) => {
+    try {
+      const res = await fetch(`${API_BASE_URL}/login/`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ username: user, password: pass }),
+      });
+      if (!res.ok) return false;
+      const data = await res.json();
+      storeCredentials(data.username, data.token);
+      setIsAuthenticated(true);
+      setUsername(data.username);
+      setPassword('');
+      setToken(data.token);
+      return true;
+    } catch {
+      return false;
+    }
+  }, []);
 
   useEffect(() => {
     const stored = getStoredCredentials();
     if (stored) {
-      setUsername(stored.username);
-      setPassword(stored.password);
-      verifyAuth(stored.username, stored.password);
+      verifyToken(stored.username, stored.token);
     }
-  }, [verifyAuth]);
+  }, [verifyToken]);
+
+  useEffect(() => {
+    if (isAuthenticated && token) {
+      loadInitialData();
+    }
+  }, [isAuthenticated, token, loadInitialData]);
 
 
   const handleLogin = useCallback(async (e) => {
     e.preventDefault();
     setError(null);
-    const ok = await verifyAuth(username, password);
+    const ok = await requestToken(username, password);
     if (ok) navigate('/dashboard');
     else setError('Invalid credentials. Please check if the backend is running and credentials are correct.');
-  }, [username, password, navigate, verifyAuth]);
+  }, [username, password, navigate, requestToken]);
 
 
   const handleLogout = () => {
     setIsAuthenticated(false);
     setUsername('');
     setPassword('');
+    setToken('');
     setEquipmentData([]);
     setSummary(null);
     setHistory([]);
@@ -172,32 +206,95 @@ function AppContent() {
     navigate('/login');
   };
 
+  const parseEvent = (message) => {
+    let type = 'message';
+    let data = '';
+    for (const line of message.split('\n')) {
+      if (line.startsWith('event: ')) type = line.slice(7);
+      else if (line.startsWith('data: ')) data += line.slice(6);
+    }
+    return data ? { type, data: JSON.parse(data) } : null;
+  };
+
+  // EventSource can't send the Authorization header, so the stream is read with fetch.
+  // Resolves with the final job, or null if the server closed the stream first.
+  const readUploadEvents = async (jobId, onProgress) => {
+    const res = await fetch(`${API_BASE_URL}/uploads/${jobId}/events/`, {
+      headers: { ...getAuthHeaders(), 'Accept': 'text/event-stream' },
+    });
+    if (!res.ok) throw new Error('Failed to follow upload progress');
+    const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) return null;
+      buffer += value;
+      const messages = buffer.split('\n\n');
+      buffer = messages.pop();
+      for (const message of messages) {
+        const event = parseEvent(message);
+        if (!event) continue;
+        if (event.type === 'progress') onProgress(event.data);
+        else if (event.type === 'done' || event.type === 'failed') return event.data;
+        else if (event.type === 'error') throw new Error(event.data.error);
+      }
+    }
+  };
+
+  // The server closes long streams; reconnect until the job finishes, but give up
+  // when the server stays unreachable or the job stops changing
+  const followUploadJob = async (jobId) => {
+    let latest = '';
+    let changed = Date.now();
+    let failures = 0;
+    const onProgress = (job) => {
+      setUploadProgress(job);
+      const state = JSON.stringify(job);
+      if (state !== latest) {
+        latest = state;
+        changed = Date.now();
+      }
+    };
+    for (;;) {
+      if (Date.now() - changed > UPLOAD_STALL_MS) throw new Error('The upload stopped making progress');
+      let job;
+      try {
+        job = await readUploadEvents(jobId, onProgress);
+      } catch (err) {
+        // fetch rejects with a TypeError when the server can't be reached
+        if (!(err instanceof TypeError) || ++failures > UPLOAD_FOLLOW_RETRIES) throw err;
+        await new Promise(resolve => setTimeout(resolve, UPLOAD_RETRY_DELAY_MS));
+        continue;
+      }
+      if (job) return job;
+      failures = 0;
+    }
+  };
+
   const handleFileUpload = async (file) => {
     setLoading(true);
     setError(null);
 
-    console.log('Uploading file:', file);
-    console.log('API URL:', `${API_BASE_URL}/upload/`);
-
     const formData = new FormData();
     formData.append('file', file);
 
     try {
-      const response = await fetch(`${API_BASE_URL}/upload/`, {
+      const response = await fetch(`${API_BASE_URL}/uploads/`, {
         method: 'POST',
         headers: getAuthHeaders(),
         body: formData,
       });
 
-      console.log('Response status:', response.status);
-      console.log('Response headers:', response.headers);
-
       if (response.ok) {
-        const result = await response.json();
-        console.log('Upload successful:', result);
-        // Add a small delay to ensure backend has processed the data
-        await new Promise(resolve => setTimeout(resolve, 500));
-        await loadInitialData();
+        const job = await response.json();
+        setUploadProgress(job);
+        const result = await followUploadJob(job.id);
+        if (result.status === 'done') {
+          console.log('Upload successful:', result.result);
+          await loadInitialData();
+        } else {
+          setError(result.error || 'Upload failed');
+        }
       } else {
         const errorData = await response.json();
         console.error('Upload failed:', errorData);
@@ -207,14 +304,32 @@ function AppContent() {
       console.error('Upload error:', err);
       setError('Upload failed. Please check your connection.');
     } finally {
+      setUploadProgress(null);
       setLoading(false);
     }
   };
 
+  const waitForReport = async (job) => {
+    while (job.status === 'pending' || job.status === 'running') {
+      await new Promise(resolve => setTimeout(resolve, REPORT_POLL_INTERVAL_MS));
+      const res = await fetch(`${API_BASE_URL}/reports/${job.id}/`, { headers: getAuthHeaders() });
+      if (!res.ok) throw new Error('Failed to check report status');
+      job = await res.json();
+    }
+    return job;
+  };
+
   const handleGeneratePDF = async (datasetId = null) => {
     try {
-      const url = datasetId ? `${API_BASE_URL}/pdf/${datasetId}/` : `${API_BASE_URL}/pdf/`;
-      const res = await fetch(url, { headers: getAuthHeaders() });
+      const jobRes = await fetch(`${API_BASE_URL}/reports/`, {
+        method: 'POST',
+        headers: { ...getAuthHeaders(), 'Content-Type': 'application/json' },
+        body: JSON.stringify({ dataset_id: datasetId }),
+      });
+      if (!jobRes.ok) { setError('Failed to generate PDF'); return; }
+      const job = await waitForReport(await jobRes.json());
+      if (job.status !== 'done') { setError(`Failed to generate PDF: ${job.error}`); return; }
+      const res = await fetch(`${API_BASE_URL}/reports/${job.id}/file/`, { headers: getAuthHeaders() });
       if (!res.ok) { setError('Failed to generate PDF'); return; }
       const blob = await res.blob();
       const link = document.createElement('a');
@@ -272,7 +387,7 @@ function AppContent() {
 
           {activeView === 'dashboard' && (
             <>
-              <FileUpload onUpload={handleFileUpload} loading={loading} />
+              <FileUpload onUpload={handleFileUpload} loading={loading} progress={uploadProgress} />
 
               {summary && (
                 <>
@@ -33,23 +33,21 @@ function Charts({ data, summary }) {
   const equipmentTypes = Object.keys(summary.equipment_type_distribution);
   const typeCounts = Object.values(summary.equipment_type_distribution);
 
-  // Flowrate by equipment
-  const flowrateData = data.map(item => ({
-    label: item.equipment_name,
-    value: item.flowrate,
-  })).slice(0, 10); // Show top 10
-
-  // Pressure by equipment
-  const pressureData = data.map(item => ({
-    label: item.equipment_name,
-    value: item.pressure,
-  })).slice(0, 10);
+  // Top 10 equipment per parameter, precomputed by the backend at upload time
+  const topEquipment = (field) => {
+    const top = summary.statistics?.top?.[field];
+    if (top) {
+      return top.map(item => ({ label: item.equipment_name, value: item.value }));
+    }
+    return data.map(item => ({
+      label: item.equipment_name,
+      value: item[field],
+    })).slice(0, 10);
+  };
 
-  // Temperature by equipment
-  const temperatureData = data.map(item => ({
-    label: item.equipment_name,
-    value: item.temperature,
-  })).slice(0, 10);
+  const flowrateData = topEquipment('flowrate');
+  const pressureData = topEquipment('pressure');
+  const temperatureData = topEquipment('temperature');
 
   // Pie chart data for equipment type distribution
   const pieData = {
@@ -30,7 +30,7 @@ ChartJS.register(
 
 function Comparison({ history, getAuthHeaders }) {
   const [selectedDatasets, setSelectedDatasets] = useState({ dataset1: null, dataset2: null });
-  const [comparisonData, setComparisonData] = useState({ data1: null, data2: null, summary1: null, summary2: null });
+  const [comparisonData, setComparisonData] = useState({ summary1: null, summary2: null, equipment: null });
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
 
@@ -39,89 +39,71 @@ function Comparison({ history, getAuthHeaders }) {
       ? 'http://localhost:8000/api' 
       : 'https://chemical-equipment-visualizer-vcel.onrender.com/api');
 
-  const loadDatasetData = async (datasetId, datasetNumber) => {
+  // Both datasets are diffed server-side in one request instead of downloading every row of each
+  const loadComparison = async (datasetId1, datasetId2) => {
+    setLoading(true);
+    setError(null);
     try {
-      const res = await fetch(`${API_BASE_URL}/data/${datasetId}/`, { headers: getAuthHeaders() });
-      const summaryRes = await fetch(`${API_BASE_URL}/summary/${datasetId}/`, { headers: getAuthHeaders() });
-      
-      if (res.ok && summaryRes.ok) {
-        const data = await res.json();
-        const summary = await summaryRes.json();
-        
-        setComparisonData(prev => ({
-          ...prev,
-          [`data${datasetNumber}`]: data,
-          [`summary${datasetNumber}`]: summary
-        }));
+      const res = await fetch(`${API_BASE_URL}/compare/${datasetId1}/${datasetId2}/`, { headers: getAuthHeaders() });
+      if (res.ok) {
+        const comparison = await res.json();
+        setComparisonData({
+          summary1: comparison.dataset1,
+          summary2: comparison.dataset2,
+          equipment: comparison.equipment,
+        });
+      } else {
+        setError('Failed to compare datasets');
       }
     } catch (err) {
-      console.error(`Failed to load dataset ${datasetNumber}:`, err);
-      setError(`Failed to load dataset ${datasetNumber}`);
+      console.error('Failed to compare datasets:', err);
+      setError('Failed to compare datasets');
     }
+    setLoading(false);
   };
 
-  const handleDatasetSelect = async (datasetId, datasetNumber) => {
-    setLoading(true);
-    setError(null);
-    
+  useEffect(() => {
+    if (selectedDatasets.dataset1 && selectedDatasets.dataset2) {
+      loadComparison(selectedDatasets.dataset1, selectedDatasets.dataset2);
+    }
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [selectedDatasets.dataset1, selectedDatasets.dataset2]);
+
+  const handleDatasetSelect = (datasetId, datasetNumber) => {
     setSelectedDatasets(prev => ({ ...prev, [`dataset${datasetNumber}`]: datasetId }));
-    await loadDatasetData(datasetId, datasetNumber);
-    
-    setLoading(false);
   };
 
   const clearSelection = (datasetNumber) => {
     setSelectedDatasets(prev => ({ ...prev, [`dataset${datasetNumber}`]: null }));
-    setComparisonData(prev => ({
-      ...prev,
-      [`data${datasetNumber}`]: null,
-      [`summary${datasetNumber}`]: null
-    }));
+    setComparisonData({ summary1: null, summary2: null, equipment: null });
   };
 
-  const canCompare = comparisonData.data1 && comparisonData.data2 && 
-                   comparisonData.summary1 && comparisonData.summary2;
+  const canCompare = comparisonData.summary1 && comparisonData.summary2;
 
   const getAdvancedMetrics = () => {
     if (!canCompare) return null;
 
-    const { summary1, summary2, data1, data2 } = comparisonData;
-    
-    const calculateStdDev = (data, field) => {
-      const values = data.map(item => item[field]);
-      const mean = values.reduce((a, b) => a + b, 0) / values.length;
-      const variance = values.reduce((a, b) => a + Math.pow(b - mean, 2), 0) / values.length;
-      return Math.sqrt(variance);
-    };
-
-    const stdDev1 = {
-      flowrate: calculateStdDev(data1, 'flowrate'),
-      pressure: calculateStdDev(data1, 'pressure'),
-      temperature: calculateStdDev(data1, 'temperature'),
-    };
-
-    const stdDev2 = {
-      flowrate: calculateStdDev(data2, 'flowrate'),
-      pressure: calculateStdDev(data2, 'pressure'),
-      temperature: calculateStdDev(data2, 'temperature'),
-    };
-
-    const getRange = (data, field) => {
-      const values = data.map(item => item[field]);
-      return { min: Math.min(...values), max: Math.max(...values) };
-    };
-
-    const range1 = {
-      flowrate: getRange(data1, 'flowrate'),
-      pressure: getRange(data1, 'pressure'),
-      temperature: getRange(data1, 'temperature'),
+    const { summary1, summary2 } = comparisonData;
+
+    const getStdDev = (summary) => ({
+      flowrate: summary.statistics.parameters.flowrate.std,
+      pressure: summary.statistics.parameters.pressure.std,
+      temperature: summary.statistics.parameters.temperature.std,
+    });
+
+    const getRange = (summary) => {
+      const { flowrate, pressure, temperature } = summary.statistics.parameters;
+      return {
+        flowrate: { min: flowrate.min, max: flowrate.max },
+        pressure: { min: pressure.min, max: pressure.max },
+        temperature: { min: temperature.min, max: temperature.max },
+      };
     };
 
-    const range2 = {
-      flowrate: getRange(data2, 'flowrate'),
-      pressure: getRange(data2, 'pressure'),
-      temperature: getRange(data2, 'temperature'),
-    };
+    const stdDev1 = getStdDev(summary1);
+    const stdDev2 = getStdDev(summary2);
+    const range1 = getRange(summary1);
+    const range2 = getRange(summary2);
 
     const calculatePerformanceScore = (summary) => {
       const flowScore = Math.min(summary.avg_flowrate / 5, 1) * 100;
@@ -151,7 +133,7 @@ function Comparison({ history, getAuthHeaders }) {
   const getComparisonChartData = () => {
     if (!canCompare) return null;
 
-    const { data1, data2, summary1, summary2 } = comparisonData;
+    const { summary1, summary2 } = comparisonData;
     
     const types1 = Object.keys(summary1.equipment_type_distribution);
     const types2 = Object.keys(summary2.equipment_type_distribution);
@@ -648,6 +630,58 @@ function Comparison({ history, getAuthHeaders }) {
               </div>
             </div>
           )}
+
+          {comparisonData.equipment && (
+            <div className="detailed-metrics">
+              <h3>Matched Equipment</h3>
+              <div className="metrics-grid">
+                <div className="metric-card">
+                  <div className="metric-header">
+                    <h4>Matched by Name</h4>
+                  </div>
+                  <div className="metric-details">
+                    <div className="detail-item">
+                      <span>Matched</span>
+                      <span>{comparisonData.equipment.matched}</span>
+                    </div>
+                    <div className="detail-item">
+                      <span>Changed</span>
+                      <span>{comparisonData.equipment.changed}</span>
+                    </div>
+                    <div className="detail-item">
+                      <span>Only in Dataset 1</span>
+                      <span>{comparisonData.equipment.only_in_dataset1}</span>
+                    </div>
+                    <div className="detail-item">
+                      <span>Only in Dataset 2</span>
+                      <span>{comparisonData.equipment.only_in_dataset2}</span>
+                    </div>
+                  </div>
+                </div>
+                {comparisonData.equipment.largest_changes.slice(0, 5).map(row => (
+                  <div className="metric-card" key={row.equipment_name}>
+                    <div className="metric-header">
+                      <h4>{row.equipment_name}</h4>
+                    </div>
+                    <div className="metric-details">
+                      <div className="detail-item">
+                        <span>Flowrate</span>
+                        <span>{row.flowrate_delta >= 0 ? '+' : ''}{row.flowrate_delta.toFixed(2)}</span>
+                      </div>
+                      <div className="detail-item">
+                        <span>Pressure</span>
+                        <span>{row.pressure_delta >= 0 ? '+' : ''}{row.pressure_delta.toFixed(2)}</span>
+                      </div>
+                      <div className="detail-item">
+                        <span>Temperature</span>
+                        <span>{row.temperature_delta >= 0 ? '+' : ''}{row.temperature_delta.toFixed(2)}</span>
+                      </div>
+                    </div>
+                  </div>
+                ))}
+              </div>
+            </div>
+          )}
         </>
       )}
     </div>
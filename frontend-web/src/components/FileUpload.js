@@ -1,7 +1,34 @@
 import React, { useRef } from 'react';
 import './FileUpload.css';
 
-function FileUpload({ onUpload, loading }) {
+const STAGE_LABELS = {
+  hash: 'Checking for duplicates',
+  parse: 'Parsing',
+  aggregate: 'Aggregating',
+  insert: 'Inserting rows',
+  prune: 'Applying retention',
+};
+
+function UploadProgress({ progress }) {
+  const percent = progress.bytes_total
+    ? Math.round((100 * progress.bytes_parsed) / progress.bytes_total)
+    : 0;
+  return (
+    <div className="upload-progress">
+      <div className="loading-spinner">
+        {progress.status === 'pending' ? 'Queued...' : `${STAGE_LABELS[progress.stage] || 'Uploading'}...`}
+      </div>
+      <div className="progress-bar">
+        <div className="progress-fill" style={{ width: `${percent}%` }} />
+      </div>
+      <p className="upload-hint">
+        {percent}% parsed · {progress.rows_inserted.toLocaleString()} rows inserted
+      </p>
+    </div>
+  );
+}
+
+function FileUpload({ onUpload, loading, progress }) {
   const fileInputRef = useRef(null);
 
   const handleFileChange = (e) => {
@@ -29,7 +56,9 @@ function FileUpload({ onUpload, loading }) {
           disabled={loading}
         />
         <div className="upload-content">
-          {loading ? (
+          {loading && progress ? (
+            <UploadProgress progress={progress} />
+          ) : loading ? (
             <div className="loading-spinner">Uploading...</div>
           ) : (
             <>